@@ -0,0 +1,80 @@
+from typing import AsyncIterable, AsyncIterator
+
+import msgpack
+import orjson
+from aiohttp import hdrs, web
+
+from common.compression import choose_encoding, create_encoder, is_compressible
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+async def read_body(request: web.Request):
+    """Декодирует тело запроса в формате JSON или msgpack по Content-Type, некорректное тело - 400."""
+    try:
+        if request.content_type == MSGPACK_CONTENT_TYPE:
+            return msgpack.unpackb(await request.read())
+        return await request.json(loads=orjson.loads)
+    except ValueError:
+        raise web.HTTPBadRequest(reason="Invalid body")
+
+
+def accepts_msgpack(request: web.Request) -> bool:
+    return MSGPACK_CONTENT_TYPE in request.headers.get("Accept", "")
+
+
+def render(request: web.Request, data) -> web.Response:
+    """Кодирует ответ в msgpack, если клиент его принимает, иначе в JSON."""
+    if accepts_msgpack(request):
+        return web.Response(body=msgpack.packb(data), content_type=MSGPACK_CONTENT_TYPE)
+    return json_body_response(orjson.dumps(data))
+
+
+def json_body_response(body: bytes) -> web.Response:
+    """Ответ с уже закодированным телом в JSON."""
+    return web.Response(body=body, content_type=JSON_CONTENT_TYPE)
+
+
+class CompressedStreamResponse(web.StreamResponse):
+    """
+    Потоковый ответ, сжимающий каждую часть тела алгоритмом, согласованным по Accept-Encoding.
+
+    Части сжимаются с flush, поэтому клиент может распаковать их по мере получения.
+    """
+
+    _encoder = None
+
+    async def prepare(self, request: web.BaseRequest):
+        if not self.prepared and is_compressible(self.content_type):
+            encoding = choose_encoding(request.headers.get(hdrs.ACCEPT_ENCODING))
+            if encoding is not None:
+                self._encoder = create_encoder(encoding)
+                self.headers[hdrs.CONTENT_ENCODING] = encoding
+                self.headers.add(hdrs.VARY, hdrs.ACCEPT_ENCODING)
+        return await super().prepare(request)
+
+    async def write(self, data: bytes):
+        if self._encoder is not None and data:
+            data = self._encoder.compress(data) + self._encoder.flush()
+        await super().write(data)
+
+    async def write_eof(self, data: bytes = b""):
+        if self._encoder is not None and not self._eof_sent:
+            data = self._encoder.compress(data) + self._encoder.finish()
+            self._encoder = None
+        await super().write_eof(data)
+
+
+async def ndjson_chunks(lines: AsyncIterable[bytes], chunk_size: int) -> AsyncIterator[bytes]:
+    """Собирает строки JSON в NDJSON и отдает их частями размером не меньше chunk_size, кроме последней."""
+    chunk, size = [], 0
+    async for line in lines:
+        chunk.append(line)
+        size += len(line) + 1
+        if size >= chunk_size:
+            yield b"\n".join(chunk) + b"\n"
+            chunk, size = [], 0
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
@@ -1,48 +1,241 @@
+import base64
+import binascii
+import math
+
 import asyncpg
+import orjson
+
+from common.pg_metrics import acquire
+
+
+async def bump_tasks_version(conn):
+    """Увеличивает версию коллекции задач."""
+    await conn.statement("bump_tasks_version").fetchval()
+
+
+async def write_tasks(conn, write):
+    """
+    Выполняет запись в tasks в транзакции и увеличивает версию коллекции, если write вернул изменения.
+
+    Версия увеличивается в транзакции записи, поэтому зафиксированная запись всегда меняет
+    версию, и еще раз после фиксации: nextval виден другим соединениям до фиксации, и чтец,
+    получивший версию до данных, мог сохранить ее в ETag вместе с прежними данными.
+    Клиент с ETag прежней версии не получит 304 на устаревших данных.
+    """
+    async with conn.transaction():
+        result = await write()
+        if result:
+            await bump_tasks_version(conn)
+    if result:
+        await bump_tasks_version(conn)
+    return result
+
+
+async def get_tasks_version(pool: asyncpg.Pool) -> int:
+    async with acquire(pool) as conn:
+        return await conn.statement("tasks_version").fetchval()
+
+
+async def get_task(pool: asyncpg.Pool, task_id: int):
+    async with acquire(pool) as conn:
+        task = await conn.statement("get_task").fetchrow(task_id)
+    if task:
+        return dict(task)
 
 
 async def create_task(pool: asyncpg.Pool, data: dict):
-    async with pool.acquire() as conn:
-        query = """
-            INSERT INTO tasks (title, description, status, user_id)
-            VALUES ($1, $2, $3, $4)
-            RETURNING *
-            """
-        task = await conn.fetchrow(query, *data.values())
+    async with acquire(pool) as conn:
+        task = await write_tasks(
+            conn,
+            lambda: conn.statement("create_task").fetchrow(
+                data["title"], data["description"], data["status"], data["user_id"]
+            ),
+        )
     return dict(task)
 
 
-async def get_tasks(pool: asyncpg.Pool, status: str = None):
-    async with pool.acquire() as conn:
+async def create_tasks(pool: asyncpg.Pool, tasks: list[dict]) -> list[dict]:
+    """Создает задачи одним запросом, результаты возвращаются в порядке входных данных."""
+    async with acquire(pool) as conn:
+        created = await write_tasks(
+            conn,
+            lambda: conn.statement("create_tasks").fetch(
+                [task["title"] for task in tasks],
+                [task["description"] for task in tasks],
+                [task["status"] for task in tasks],
+                [task["user_id"] for task in tasks],
+            ),
+        )
+    return [dict(task) for task in created]
+
+
+# Наибольший id задачи (tasks.id - SERIAL, int4)
+MAX_TASK_ID = 2**31 - 1
+
+
+def encode_cursor(task_id: int) -> str:
+    """Кодирует id последней задачи страницы в непрозрачный курсор."""
+    return base64.urlsafe_b64encode(str(task_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Декодирует курсор в id задачи, после которой начинается страница."""
+    try:
+        task_id = int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if not 0 < task_id <= MAX_TASK_ID:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return task_id
+
+
+async def get_tasks(pool: asyncpg.Pool, limit: int, status: str = None, cursor: str = None):
+    after_id = decode_cursor(cursor) if cursor else 0
+    async with acquire(pool) as conn:
+        if status:
+            tasks = await conn.statement("list_tasks_by_status").fetch(status, after_id, limit + 1)
+        else:
+            tasks = await conn.statement("list_tasks").fetch(after_id, limit + 1)
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_cursor(tasks[-1]["id"])
+    return {"tasks": [dict(task) for task in tasks], "next_cursor": next_cursor}
+
+
+def page_json(page: asyncpg.Record, encode_next_cursor) -> bytes:
+    """
+    Тело ответа со страницей задач из JSON, собранного Postgres (запросы *_json).
+
+    Массив задач вставляется в ответ как есть, разбирается только значение курсора.
+    """
+    next_cursor = encode_next_cursor(*orjson.loads(page["cursor"])) if page["has_more"] else None
+    return b'{"tasks":' + page["tasks"].encode() + b',"next_cursor":' + orjson.dumps(next_cursor) + b"}"
+
+
+async def get_tasks_json(pool: asyncpg.Pool, limit: int, status: str = None, cursor: str = None) -> bytes:
+    """Та же страница, что и get_tasks, сразу в виде тела ответа в JSON."""
+    after_id = decode_cursor(cursor) if cursor else 0
+    async with acquire(pool) as conn:
+        if status:
+            page = await conn.statement("list_tasks_by_status_json").fetchrow(status, after_id, limit + 1)
+        else:
+            page = await conn.statement("list_tasks_json").fetchrow(after_id, limit + 1)
+    return page_json(page, encode_cursor)
+
+
+def encode_search_cursor(rank: float, task_id: int) -> str:
+    """Кодирует ранг и id последней задачи страницы поиска в непрозрачный курсор."""
+    return base64.urlsafe_b64encode(f"{rank!r}:{task_id}".encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int]:
+    """Декодирует курсор поиска в ранг и id задачи, после которой начинается страница."""
+    try:
+        rank, task_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        rank, task_id = float(rank), int(task_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if not 0 < task_id <= MAX_TASK_ID or not math.isfinite(rank):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return rank, task_id
+
+
+async def search_tasks(pool: asyncpg.Pool, query: str, limit: int, status: str = None, cursor: str = None):
+    """Страница задач, найденных по тексту query в названии и описании, в порядке убывания релевантности."""
+    after_rank, after_id = decode_search_cursor(cursor) if cursor else (math.inf, 0)
+    async with acquire(pool) as conn:
         if status:
-            query = "SELECT * FROM tasks WHERE status = $1"
-            tasks = await conn.fetch(query, status)
+            statement, args = conn.statement("search_tasks_by_status"), (status,)
         else:
-            query = "SELECT * FROM tasks"
-            tasks = await conn.fetch(query)
-        return {"tasks": [dict(task) for task in tasks]}
+            statement, args = conn.statement("search_tasks"), ()
+        tasks = [dict(task) for task in await statement.fetch(query, after_rank, after_id, limit + 1, *args)]
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_search_cursor(tasks[-1]["rank"], tasks[-1]["id"])
+    for task in tasks:
+        del task["rank"]
+    return {"tasks": tasks, "next_cursor": next_cursor}
+
+
+async def search_tasks_json(
+    pool: asyncpg.Pool,
+    query: str,
+    limit: int,
+    status: str = None,
+    cursor: str = None,
+) -> bytes:
+    """Та же страница, что и search_tasks, сразу в виде тела ответа в JSON."""
+    after_rank, after_id = decode_search_cursor(cursor) if cursor else (math.inf, 0)
+    async with acquire(pool) as conn:
+        if status:
+            statement, args = conn.statement("search_tasks_by_status_json"), (status,)
+        else:
+            statement, args = conn.statement("search_tasks_json"), ()
+        page = await statement.fetchrow(query, after_rank, after_id, limit + 1, *args)
+    return page_json(page, encode_search_cursor)
+
+
+async def iter_tasks_json(pool: asyncpg.Pool, prefetch: int, status: str = None):
+    """
+    Построчно отдает задачи в JSON, собранном Postgres, из серверного курсора.
+
+    Вся выборка в память не загружается, строки задач не разбираются.
+    """
+    async with acquire(pool) as conn:
+        async with conn.transaction():
+            if status:
+                cursor = conn.statement("stream_tasks_by_status").cursor(status, prefetch=prefetch)
+            else:
+                cursor = conn.statement("stream_tasks").cursor(prefetch=prefetch)
+            async for task in cursor:
+                yield task["task"].encode()
 
 
 async def update_task(pool: asyncpg.Pool, data: dict):
-    async with pool.acquire() as conn:
-        query = """
-                 UPDATE tasks
-                 SET title = $1, description = $2, status = $3
-                 WHERE id = $4
-                 RETURNING *
-                 """
-        updated_rows = await conn.fetchrow(query, *data.values())
-        if updated_rows:
-            return dict(updated_rows)
+    """Обновляет задачу data["id"], не переданные поля сохраняют прежние значения."""
+    async with acquire(pool) as conn:
+        updated_rows = await write_tasks(
+            conn,
+            lambda: conn.statement("update_task").fetchrow(
+                data.get("title"), data.get("description"), data.get("status"), data["id"]
+            ),
+        )
+    if updated_rows:
+        return dict(updated_rows)
+
+
+async def update_tasks(pool: asyncpg.Pool, tasks: list[dict]) -> list[dict | None]:
+    """
+    Обновляет задачи одним запросом, не переданные поля сохраняют прежние значения.
+
+    Для каждого элемента входных данных возвращается обновленная задача или None, если задача не найдена.
+    """
+    async with acquire(pool) as conn:
+        updated = await write_tasks(
+            conn,
+            lambda: conn.statement("update_tasks").fetch(
+                [task["id"] for task in tasks],
+                [task.get("title") for task in tasks],
+                [task.get("description") for task in tasks],
+                [task.get("status") for task in tasks],
+            ),
+        )
+    updated_by_id = {task["id"]: dict(task) for task in updated}
+    return [updated_by_id.get(task["id"]) for task in tasks]
+
+
+async def delete_tasks(pool: asyncpg.Pool, task_ids: list[int]) -> list[dict | None]:
+    """Удаляет задачи одним запросом, для каждого id возвращается удаленная задача или None."""
+    async with acquire(pool) as conn:
+        deleted = await write_tasks(conn, lambda: conn.statement("delete_tasks").fetch(task_ids))
+    deleted_by_id = {task["id"]: dict(task) for task in deleted}
+    return [deleted_by_id.get(task_id) for task_id in task_ids]
 
 
 async def delete_task(pool: asyncpg.Pool, task_id: int):
-    async with pool.acquire() as conn:
-        query = """
-            DELETE FROM tasks
-            WHERE id = $1
-            RETURNING *
-                 """
-        deleted_task = await conn.fetchrow(query, task_id)
+    async with acquire(pool) as conn:
+        deleted_task = await write_tasks(conn, lambda: conn.statement("delete_task").fetchrow(task_id))
     if deleted_task:
         return dict(deleted_task)
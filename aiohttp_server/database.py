@@ -1,3 +1,7 @@
+import asyncpg
+
+from aiohttp_server.queries import QUERIES
+from common.pg_metrics import TimedStatement
 from config import settings
 
 DATABASE_URL = "postgresql://{user}:{password}@{host}:{port}/{db}".format(
@@ -7,3 +11,30 @@ DATABASE_URL = "postgresql://{user}:{password}@{host}:{port}/{db}".format(
     port=settings.postgres.port,
     db=settings.postgres.database,
 )
+
+
+class TasksConnection(asyncpg.Connection):
+    """
+    Соединение, выполняющее запросы crud по именам из QUERIES.
+
+    Запросы выполняются через кэш подготовленных запросов asyncpg (statement_cache_size
+    должен вмещать QUERIES), который сохраняется при возврате соединения в пул.
+    prepare_statements заполняет кэш при добавлении соединения в пул.
+    """
+
+    async def prepare_statements(self):
+        # executemany без наборов аргументов только подготавливает запрос и сохраняет его в кэше
+        for query in QUERIES.values():
+            await self.executemany(query, [])
+
+    def statement(self, name: str) -> TimedStatement:
+        return TimedStatement(self, name, QUERIES[name])
+
+
+async def create_pool() -> asyncpg.Pool:
+    return await asyncpg.create_pool(
+        DATABASE_URL,
+        connection_class=TasksConnection,
+        init=TasksConnection.prepare_statements,
+        **settings.postgres.pool_kwargs(),
+    )
@@ -1,21 +1,60 @@
-import asyncpg
+import asyncio
+
 from aiohttp import web
 
-from aiohttp_server.database import DATABASE_URL
+from aiohttp_server.database import create_pool
+from aiohttp_server.middlewares import (
+    compression_middleware,
+    concurrency_middleware,
+    deadline_middleware,
+    metrics_middleware,
+    profiling_middleware,
+)
 from aiohttp_server.routes import routes
+from common.metrics import monitor_event_loop_lag
+from common.tracing import setup_tracing, shutdown_tracing
+from config import settings
+
+middlewares = [metrics_middleware, compression_middleware, deadline_middleware, concurrency_middleware]
+if settings.profiling.enabled:
+    middlewares.insert(0, profiling_middleware)
+
+app = web.Application(middlewares=middlewares)
+
+
+async def init_tracing(app):
+    setup_tracing("aiohttp_server")
+
 
-app = web.Application()
+async def close_tracing(app):
+    shutdown_tracing()
 
 
 async def init_db(app):
-    app["pool"] = await asyncpg.create_pool(DATABASE_URL)
+    app["pool"] = await create_pool()
 
 
 async def close_db(app):
     await app["pool"].close()
 
 
+async def start_loop_lag_monitor(app):
+    app["loop_lag_monitor"] = asyncio.create_task(monitor_event_loop_lag(settings.metrics.event_loop_lag_interval))
+
+
+async def stop_loop_lag_monitor(app):
+    app["loop_lag_monitor"].cancel()
+
+
+app.on_startup.append(init_tracing)
 app.on_startup.append(init_db)
+app.on_startup.append(start_loop_lag_monitor)
 app.on_cleanup.append(close_db)
+app.on_cleanup.append(stop_loop_lag_monitor)
+app.on_cleanup.append(close_tracing)
 
 app.router.add_routes(routes)
+
+
+if __name__ == "__main__":
+    web.run_app(app, host="0.0.0.0", port=settings.aiohttp.port, path=settings.aiohttp.unix_socket)
@@ -0,0 +1,126 @@
+import time
+
+from aiohttp import hdrs, web
+
+from aiohttp_server.codec import NDJSON_CONTENT_TYPE
+from common.compression import choose_encoding, compress, is_compressible, weaken_etag
+from common.concurrency import AdaptiveLimiter, LimitExceeded
+from common.metrics import UNMATCHED_ROUTE, observe_request
+from common.profiling import PROFILE_FILE_HEADER, profile_path, profile_request, should_profile
+from common.tracing import server_span
+from config import settings
+
+DEADLINE_HEADER = "X-Request-Deadline"
+
+
+def is_overload(error: BaseException) -> bool:
+    """Ответы 4xx не говорят о перегрузке сервиса."""
+    return not isinstance(error, web.HTTPException) or error.status >= 500
+
+
+handler_limiter = AdaptiveLimiter("handlers", is_overload=is_overload, **settings.concurrency_limit.limiter_kwargs())
+stream_limiter = AdaptiveLimiter(
+    "streams",
+    is_overload=is_overload,
+    **settings.concurrency_limit.stream_limiter_kwargs(),
+)
+
+
+@web.middleware
+async def metrics_middleware(request, handler):
+    """
+    Замеряет время обработки и число выполняющихся запросов по шаблону маршрута.
+
+    Запрос записывается серверным спаном, продолжающим трассу FastAPI из заголовка traceparent.
+    """
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource else UNMATCHED_ROUTE
+    method = request.method
+    with observe_request(method, route) as outcome, server_span(method, route, request.headers) as span:
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            outcome["status"] = e.status
+            raise
+        finally:
+            span.set_attribute("http.response.status_code", outcome["status"])
+        outcome["status"] = response.status
+        return response
+
+
+@web.middleware
+async def profiling_middleware(request, handler):
+    """Профилирует запросы, выбранные should_profile, имя файла профиля возвращается в X-Profile-File."""
+    if not should_profile(request.headers):
+        return await handler(request)
+    resource = request.match_info.route.resource
+    path = profile_path("aiohttp_server", request.method, resource.canonical if resource else UNMATCHED_ROUTE)
+    async with profile_request(path):
+        response = await handler(request)
+    if not response.prepared:
+        response.headers[PROFILE_FILE_HEADER] = path.name
+    return response
+
+
+@web.middleware
+async def compression_middleware(request, handler):
+    """
+    Сжимает тело ответа алгоритмом, согласованным по Accept-Encoding.
+
+    Ответы меньше settings.compression.min_size не сжимаются. Потоковые ответы
+    к этому моменту уже отправлены, их сжимает codec.CompressedStreamResponse.
+    """
+    response = await handler(request)
+    if (
+        response.prepared
+        or not isinstance(response, web.Response)
+        or not isinstance(response.body, bytes)
+        or len(response.body) < settings.compression.min_size
+        or hdrs.CONTENT_ENCODING in response.headers
+        or not is_compressible(response.content_type)
+    ):
+        return response
+    encoding = choose_encoding(request.headers.get(hdrs.ACCEPT_ENCODING))
+    if encoding is None:
+        return response
+    response.body = compress(encoding, response.body)
+    response.headers[hdrs.CONTENT_ENCODING] = encoding
+    response.headers.add(hdrs.VARY, hdrs.ACCEPT_ENCODING)
+    if hdrs.ETAG in response.headers:
+        response.headers[hdrs.ETAG] = weaken_etag(response.headers[hdrs.ETAG])
+    return response
+
+
+def check_deadline(request):
+    """504, если крайний срок запроса (unix-время в мс в X-Request-Deadline) уже истек."""
+    deadline = request.headers.get(DEADLINE_HEADER)
+    if deadline and deadline.isdigit() and int(deadline) / 1000 <= time.time():
+        raise web.HTTPGatewayTimeout(reason="Request deadline exceeded")
+
+
+@web.middleware
+async def deadline_middleware(request, handler):
+    """Не выполняет запрос, крайний срок которого уже истек, не дожидаясь очереди concurrency_middleware."""
+    check_deadline(request)
+    return await handler(request)
+
+
+@web.middleware
+async def concurrency_middleware(request, handler):
+    """
+    Ограничивает число одновременно выполняющихся обработчиков адаптивным пределом.
+
+    Сверх предела и очереди запросы сразу получают 503 с Retry-After. Запрос, крайний срок
+    которого истек за время ожидания в очереди, получает 504 без вызова обработчика.
+    Потоковая выгрузка NDJSON держит соединение пула и курсор до конца ответа, поэтому
+    ограничивается отдельным постоянным пределом settings.concurrency_limit.stream_limit
+    и не влияет на адаптивный предел обычных запросов.
+    """
+    streaming = NDJSON_CONTENT_TYPE in request.headers.get("Accept", "")
+    limiter = stream_limiter if streaming else handler_limiter
+    try:
+        async with limiter.acquire():
+            check_deadline(request)
+            return await handler(request)
+    except LimitExceeded as e:
+        raise web.HTTPServiceUnavailable(headers={"Retry-After": str(int(e.retry_after))})
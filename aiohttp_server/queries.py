@@ -0,0 +1,149 @@
+# Статус хранится в tasks.status_id как код из справочника task_statuses,
+# наружу задачи отдаются с названием статуса.
+TASK_COLUMNS = "t.id, t.title, t.description, s.name AS status, t.user_id"
+TASKS_WITH_STATUS = "tasks t JOIN task_statuses s ON s.id = t.status_id"
+# Задача в JSON из колонок подзапроса с TASK_COLUMNS, ключи в том же порядке
+TASK_JSON = (
+    "json_build_object('id', id, 'title', title, 'description', description, 'status', status, 'user_id', user_id)"
+)
+
+# Страница задач, собранная в JSON в Postgres: строка tasks отдается клиенту без разбора.
+# query выбирает на одну задачу больше страницы (${limit} - размер выборки), по лишней
+# задаче видно, что есть следующая страница. cursor - JSON-массив значений {cursor}
+# последней задачи страницы для курсора следующей.
+TASKS_PAGE_JSON = """
+    WITH page AS (
+        SELECT selected.*, row_number() OVER (ORDER BY {order}) AS n
+        FROM ({query}) AS selected
+    )
+    SELECT
+        COALESCE(json_agg({task_json} ORDER BY n) FILTER (WHERE n < ${limit}), '[]')::text AS tasks,
+        count(*) = ${limit} AS has_more,
+        (array_agg(json_build_array({cursor})::text ORDER BY n DESC) FILTER (WHERE n < ${limit}))[1] AS cursor
+    FROM page
+"""
+
+# Поиск: совпадение по tsvector (индекс tasks_search_idx) или по триграммам названия
+# (tasks_title_trgm_idx) для префиксов и опечаток. Страницы идут по убыванию rank,
+# следующая страница начинается после пары (rank, id) последней задачи предыдущей.
+SEARCH_TASKS = f"""
+    SELECT {TASK_COLUMNS}, r.rank
+    FROM {TASKS_WITH_STATUS},
+        websearch_to_tsquery('russian', $1) AS q,
+        LATERAL (SELECT (ts_rank_cd(t.search, q) + word_similarity($1, t.title))::real AS rank) AS r
+    WHERE (t.search @@ q OR $1 <% t.title)
+        AND (r.rank < $2 OR (r.rank = $2 AND t.id > $3))
+        {{status_filter}}
+    ORDER BY r.rank DESC, t.id
+    LIMIT $4
+"""
+
+# Запросы crud по именам, каждый подготавливается один раз на соединение пула.
+QUERIES: dict[str, str] = {
+    "create_task": """
+        INSERT INTO tasks (title, description, status_id, user_id)
+        VALUES ($1, $2, task_status_id($3), $4)
+        RETURNING id, title, description, $3::varchar AS status, user_id
+        """,
+    "create_tasks": """
+        WITH input AS (
+            SELECT *
+            FROM UNNEST($1::varchar[], $2::text[], $3::varchar[], $4::int[])
+                WITH ORDINALITY AS i(title, description, status, user_id, ord)
+        ),
+        statuses AS (
+            SELECT name, task_status_id(name) AS id
+            FROM (SELECT DISTINCT status AS name FROM input) AS names
+        ),
+        created AS (
+            INSERT INTO tasks (title, description, status_id, user_id)
+            SELECT i.title, i.description, s.id, i.user_id
+            FROM input i LEFT JOIN statuses s ON s.name = i.status
+            ORDER BY i.ord
+            RETURNING *
+        )
+        SELECT t.id, t.title, t.description, s.name AS status, t.user_id
+        FROM created t JOIN statuses s ON s.id = t.status_id
+        ORDER BY t.id
+        """,
+    "get_task": f"""
+        SELECT {TASK_COLUMNS} FROM {TASKS_WITH_STATUS}
+        WHERE t.id = $1
+        """,
+    "tasks_version": "SELECT last_value FROM tasks_version_seq",
+    "bump_tasks_version": "SELECT nextval('tasks_version_seq')",
+    "list_tasks": f"""
+        SELECT {TASK_COLUMNS} FROM {TASKS_WITH_STATUS}
+        WHERE t.id > $1
+        ORDER BY t.id LIMIT $2
+        """,
+    "list_tasks_by_status": f"""
+        SELECT {TASK_COLUMNS} FROM {TASKS_WITH_STATUS}
+        WHERE t.status_id = (SELECT id FROM task_statuses WHERE name = $1) AND t.id > $2
+        ORDER BY t.id LIMIT $3
+        """,
+    "search_tasks": SEARCH_TASKS.format(status_filter=""),
+    "search_tasks_by_status": SEARCH_TASKS.format(
+        status_filter="AND t.status_id = (SELECT id FROM task_statuses WHERE name = $5)"
+    ),
+    "stream_tasks": f"""
+        SELECT {TASK_JSON}::text AS task
+        FROM (SELECT {TASK_COLUMNS} FROM {TASKS_WITH_STATUS}) AS q
+        ORDER BY id
+        """,
+    "stream_tasks_by_status": f"""
+        SELECT {TASK_JSON}::text AS task
+        FROM (
+            SELECT {TASK_COLUMNS} FROM {TASKS_WITH_STATUS}
+            WHERE t.status_id = (SELECT id FROM task_statuses WHERE name = $1)
+        ) AS q
+        ORDER BY id
+        """,
+    "update_task": """
+        UPDATE tasks t
+        SET title = COALESCE($1, t.title),
+            description = COALESCE($2, t.description),
+            status_id = COALESCE(task_status_id($3), t.status_id)
+        FROM task_statuses s
+        WHERE t.id = $4 AND s.id = t.status_id
+        RETURNING t.id, t.title, t.description, COALESCE($3::varchar, s.name) AS status, t.user_id
+        """,
+    "update_tasks": """
+        UPDATE tasks t
+        SET title = COALESCE(u.title, t.title),
+            description = COALESCE(u.description, t.description),
+            status_id = COALESCE(task_status_id(u.status), t.status_id)
+        FROM UNNEST($1::int[], $2::varchar[], $3::text[], $4::varchar[])
+            AS u(id, title, description, status),
+            task_statuses s
+        WHERE t.id = u.id AND s.id = t.status_id
+        RETURNING t.id, t.title, t.description, COALESCE(u.status, s.name) AS status, t.user_id
+        """,
+    "delete_task": """
+        DELETE FROM tasks t
+        USING task_statuses s
+        WHERE t.id = $1 AND s.id = t.status_id
+        RETURNING t.id, t.title, t.description, s.name AS status, t.user_id
+        """,
+    "delete_tasks": """
+        DELETE FROM tasks t
+        USING task_statuses s
+        WHERE t.id = ANY($1::int[]) AND s.id = t.status_id
+        RETURNING t.id, t.title, t.description, s.name AS status, t.user_id
+        """,
+}
+
+# Те же страницы списка и поиска с JSON, собранным в Postgres, для ответов в JSON
+for name, order, cursor, limit in (
+    ("list_tasks", "id", "id", 2),
+    ("list_tasks_by_status", "id", "id", 3),
+    ("search_tasks", "rank DESC, id", "rank, id", 4),
+    ("search_tasks_by_status", "rank DESC, id", "rank, id", 4),
+):
+    QUERIES[f"{name}_json"] = TASKS_PAGE_JSON.format(
+        query=QUERIES[name],
+        order=order,
+        task_json=TASK_JSON,
+        cursor=cursor,
+        limit=limit,
+    )
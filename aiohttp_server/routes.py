@@ -1,33 +1,231 @@
+from typing import Optional
+
 from aiohttp import web
 
-from aiohttp_server.crud import create_task, delete_task, get_tasks, update_task
+from aiohttp_server.codec import (
+    NDJSON_CONTENT_TYPE,
+    CompressedStreamResponse,
+    accepts_msgpack,
+    json_body_response,
+    ndjson_chunks,
+    read_body,
+    render,
+)
+from aiohttp_server.crud import (
+    MAX_TASK_ID,
+    create_task,
+    create_tasks,
+    delete_task,
+    delete_tasks,
+    get_task,
+    get_tasks,
+    get_tasks_json,
+    get_tasks_version,
+    iter_tasks_json,
+    search_tasks,
+    search_tasks_json,
+    update_task,
+    update_tasks,
+)
+from common.etag import etag_matches, make_etag
+from common.metrics import render_metrics
+from common.task_statuses import TASK_STATUSES
+from config import settings
 
 routes = web.RouteTableDef()
 
 
+async def stream_tasks(request):
+    """
+    Отдает все задачи, подходящие под фильтр, в формате NDJSON по мере чтения из курсора.
+
+    Параметры проверяются до отправки заголовков: после prepare ответить 400 уже нельзя.
+    """
+    tasks = iter_tasks_json(
+        pool=request.app["pool"],
+        prefetch=settings.tasks.stream_prefetch,
+        status=read_status(request),
+    )
+    response = CompressedStreamResponse(headers={"Content-Type": NDJSON_CONTENT_TYPE})
+    await response.prepare(request)
+    async for chunk in ndjson_chunks(tasks, settings.tasks.stream_chunk_size):
+        await response.write(chunk)
+    await response.write_eof()
+    return response
+
+
+def read_limit(request) -> int:
+    """Размер страницы из параметра limit, ограниченный settings.tasks.max_page_size."""
+    try:
+        limit = int(request.query.get("limit", settings.tasks.default_page_size))
+    except ValueError:
+        raise web.HTTPBadRequest(reason="Invalid limit")
+    return max(1, min(limit, settings.tasks.max_page_size))
+
+
+def read_status(request) -> Optional[str]:
+    """Фильтр по статусу из параметра status, статус вне справочника - 400."""
+    status = request.query.get("status")
+    if status is not None and status not in TASK_STATUSES:
+        raise web.HTTPBadRequest(reason="Invalid status")
+    return status
+
+
+async def check_etag(request) -> str:
+    """
+    ETag ответа из версии коллекции задач, пути, параметров и формата ответа.
+
+    Если клиент уже получил это представление (If-None-Match), отвечает 304 до выполнения запроса.
+    """
+    version = await get_tasks_version(request.app["pool"])
+    etag = make_etag(version, request.path, sorted(request.query.items()), accepts_msgpack(request))
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        raise web.HTTPNotModified(headers={"ETag": etag})
+    return etag
+
+
+def is_task_id(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and 0 < value <= MAX_TASK_ID
+
+
+# Проверки значений полей задачи в теле запроса, None допустим только для необязательных полей
+TASK_FIELDS = {
+    "id": is_task_id,
+    "title": lambda value: isinstance(value, str) and len(value) <= 255,
+    "description": lambda value: isinstance(value, str),
+    "status": lambda value: value in TASK_STATUSES,
+    "user_id": lambda value: value is None or is_task_id(value),
+}
+CREATE_FIELDS = ("title", "description", "status", "user_id")
+UPDATE_FIELDS = ("title", "description", "status")
+
+
+def check_task(item, required: tuple[str, ...], optional: tuple[str, ...] = ()) -> dict:
+    """Проверяет, что задача из тела запроса - объект с полями допустимых типов, иначе 400."""
+    if not isinstance(item, dict):
+        raise web.HTTPBadRequest(reason="Expected an object")
+    for field in required:
+        if field not in item:
+            raise web.HTTPBadRequest(reason=f"Missing field: {field}")
+        if not TASK_FIELDS[field](item[field]):
+            raise web.HTTPBadRequest(reason=f"Invalid field: {field}")
+    for field in optional:
+        if item.get(field) is not None and not TASK_FIELDS[field](item[field]):
+            raise web.HTTPBadRequest(reason=f"Invalid field: {field}")
+    return item
+
+
+async def read_batch(request) -> list:
+    """Читает из тела запроса непустой список элементов пакетной операции ограниченного размера."""
+    data = await read_body(request)
+    if not isinstance(data, list) or not data:
+        raise web.HTTPBadRequest(reason="Expected a non-empty list")
+    if len(data) > settings.tasks.max_batch_size:
+        raise web.HTTPRequestEntityTooLarge(max_size=settings.tasks.max_batch_size, actual_size=len(data))
+    return data
+
+
 @routes.get("/tasks")
 async def get_task_endpoint(request):
-    data = request.query.get("status")
-    result = await get_tasks(pool=request.app["pool"], status=data)
-    return web.json_response(result)
+    if NDJSON_CONTENT_TYPE in request.headers.get("Accept", ""):
+        return await stream_tasks(request)
+    etag = await check_etag(request)
+    page = dict(
+        pool=request.app["pool"],
+        limit=read_limit(request),
+        status=read_status(request),
+        cursor=request.query.get("cursor"),
+    )
+    try:
+        if accepts_msgpack(request):
+            response = render(request, await get_tasks(**page))
+        else:
+            response = json_body_response(await get_tasks_json(**page))
+    except ValueError:
+        raise web.HTTPBadRequest(reason="Invalid cursor")
+    response.headers["ETag"] = etag
+    return response
+
+
+@routes.get(r"/tasks/{id:\d+}")
+async def get_task_by_id_endpoint(request):
+    etag = await check_etag(request)
+    result = await get_task(pool=request.app["pool"], task_id=int(request.match_info["id"]))
+    response = render(request, result)
+    if result:
+        response.headers["ETag"] = etag
+    return response
+
+
+@routes.get("/tasks/search")
+async def search_tasks_endpoint(request):
+    query = request.query.get("q", "").strip()
+    if not query or len(query) > settings.tasks.max_search_query_length:
+        raise web.HTTPBadRequest(reason="Invalid query")
+    etag = await check_etag(request)
+    page = dict(
+        pool=request.app["pool"],
+        query=query,
+        limit=read_limit(request),
+        status=read_status(request),
+        cursor=request.query.get("cursor"),
+    )
+    try:
+        if accepts_msgpack(request):
+            response = render(request, await search_tasks(**page))
+        else:
+            response = json_body_response(await search_tasks_json(**page))
+    except ValueError:
+        raise web.HTTPBadRequest(reason="Invalid cursor")
+    response.headers["ETag"] = etag
+    return response
 
 
 @routes.post("/tasks")
 async def create_task_endpoint(request):
-    data = await request.json()
+    data = check_task(await read_body(request), CREATE_FIELDS)
     result = await create_task(request.app["pool"], data)
-    return web.json_response(result)
+    return render(request, result)
 
 
 @routes.put("/tasks")
 async def update_task_endpoint(request):
-    data = await request.json()
+    data = check_task(await read_body(request), ("id",), UPDATE_FIELDS)
     result = await update_task(request.app["pool"], data)
-    return web.json_response(result)
+    return render(request, result)
+
 
+@routes.post("/tasks/batch")
+async def create_tasks_endpoint(request):
+    data = [check_task(item, CREATE_FIELDS) for item in await read_batch(request)]
+    result = await create_tasks(request.app["pool"], data)
+    return render(request, result)
 
-@routes.delete("/tasks/{id}")
+
+@routes.put("/tasks/batch")
+async def update_tasks_endpoint(request):
+    data = [check_task(item, ("id",), UPDATE_FIELDS) for item in await read_batch(request)]
+    result = await update_tasks(request.app["pool"], data)
+    return render(request, result)
+
+
+@routes.delete("/tasks/batch")
+async def delete_tasks_endpoint(request):
+    data = await read_batch(request)
+    if not all(is_task_id(idx) for idx in data):
+        raise web.HTTPBadRequest(reason="Expected a list of task ids")
+    result = await delete_tasks(request.app["pool"], data)
+    return render(request, result)
+
+
+@routes.delete(r"/tasks/{id:\d+}")
 async def delete_task_endpoint(request):
     idx = request.match_info["id"]
     result = await delete_task(pool=request.app["pool"], task_id=int(idx))
-    return web.json_response(result)
+    return render(request, result)
+
+
+@routes.get("/metrics")
+async def metrics_endpoint(request):
+    body, content_type = render_metrics()
+    return web.Response(body=body, headers={"Content-Type": content_type})
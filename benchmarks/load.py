@@ -0,0 +1,161 @@
+"""
+Нагрузочные сценарии для запущенного FastAPI: список, создание, изменение и удаление задач, вход и обновление токена.
+
+Запуск из корня репозитория при поднятом docker-compose:
+    python -m benchmarks.load [--base-url http://localhost:8000] [--concurrency 32] [--duration 10]
+                              [--scenarios list,create] [--baseline benchmarks/results/load-....json]
+
+Каждый сценарий выполняется concurrency параллельными клиентами в течение duration секунд,
+для него считаются p50/p99 задержки, пропускная способность и число ошибочных ответов.
+Ограничения частоты запросов (settings.rate_limit) на время замера нужно отключить,
+например RATE_LIMIT='{"enabled": false}' в окружении сервиса app.
+"""
+
+import argparse
+import asyncio
+import uuid
+from itertools import count
+from pathlib import Path
+from time import perf_counter
+
+import aiohttp
+
+from benchmarks.results import print_report, save, summarize
+
+TASK = {"title": "load test", "description": "load test task", "status": "Добавлена"}
+
+
+class Client:
+    """Пользователь нагрузочного теста с токеном доступа и refresh-токеном."""
+
+    def __init__(self, session: aiohttp.ClientSession, base_url: str):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.username = f"load-{uuid.uuid4().hex[:12]}"
+        self.password = uuid.uuid4().hex
+        self.access_token = None
+        self.refresh_token = None
+
+    @property
+    def auth_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.access_token}"}
+
+    async def register(self):
+        credentials = {"username": self.username, "password": self.password}
+        async with self.session.post(f"{self.base_url}/auth/register/", json=credentials) as response:
+            response.raise_for_status()
+
+    async def login(self) -> int:
+        form = {"username": self.username, "password": self.password}
+        async with self.session.post(f"{self.base_url}/auth/login/", data=form) as response:
+            if response.ok:
+                self.access_token = (await response.json())["access_token"]
+                self.refresh_token = response.cookies["refresh_token"].value
+            return response.status
+
+    async def refresh(self) -> int:
+        headers = {"Cookie": f"refresh_token={self.refresh_token}"}
+        async with self.session.post(f"{self.base_url}/auth/refresh/", headers=headers) as response:
+            await response.read()
+            return response.status
+
+    async def list_tasks(self) -> int:
+        url = f"{self.base_url}/tasks/"
+        async with self.session.get(url, params={"limit": 100}, headers=self.auth_headers) as response:
+            await response.read()
+            return response.status
+
+    async def create_task(self) -> tuple[int, int | None]:
+        url = f"{self.base_url}/tasks/"
+        async with self.session.post(url, json=TASK, headers=self.auth_headers) as response:
+            if not response.ok:
+                return response.status, None
+            return response.status, (await response.json())["task"]["id"]
+
+    async def update_task(self, task_id: int, n: int) -> int:
+        url = f"{self.base_url}/tasks/{task_id}/"
+        task = {**TASK, "title": f"load test {n}", "status": "В работе"}
+        async with self.session.put(url, json=task, headers=self.auth_headers) as response:
+            await response.read()
+            return response.status
+
+    async def delete_task(self, task_id: int) -> int:
+        url = f"{self.base_url}/tasks/{task_id}/"
+        async with self.session.delete(url, headers=self.auth_headers) as response:
+            await response.read()
+            return response.status
+
+
+async def run_worker(client: Client, scenario: str, deadline: float, latencies: list, errors: list, created: list):
+    """Выполняет запросы сценария до истечения deadline, подготовительные запросы не замеряются."""
+    requests = count()
+    while perf_counter() < deadline:
+        n = next(requests)
+        task_id = None
+        if scenario in ("update", "delete"):
+            _, task_id = await client.create_task()
+            if task_id is None:
+                errors.append(scenario)
+                continue
+
+        started = perf_counter()
+        if scenario == "list":
+            status = await client.list_tasks()
+        elif scenario == "create":
+            status, task_id = await client.create_task()
+        elif scenario == "update":
+            status = await client.update_task(task_id, n)
+        elif scenario == "delete":
+            status = await client.delete_task(task_id)
+            task_id = None
+        elif scenario == "login":
+            status = await client.login()
+        else:
+            status = await client.refresh()
+        latencies.append(perf_counter() - started)
+
+        if status >= 400:
+            errors.append(scenario)
+        if task_id is not None:
+            created.append((client, task_id))
+
+
+async def run_scenario(clients: list[Client], scenario: str, duration: float) -> dict:
+    latencies, errors, created = [], [], []
+    started = perf_counter()
+    await asyncio.gather(
+        *(run_worker(client, scenario, started + duration, latencies, errors, created) for client in clients)
+    )
+    result = summarize(latencies, perf_counter() - started, errors=len(errors))
+    for client, task_id in created:
+        await client.delete_task(task_id)
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="длительность каждого сценария в секундах")
+    parser.add_argument("--scenarios", default="list,create,update,delete,login,refresh")
+    parser.add_argument("--baseline", type=Path, help="файл результатов для сравнения")
+    args = parser.parse_args()
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # У каждого клиента свой пользователь: вход заменяет refresh-токен пользователя в Redis
+        clients = [Client(session, args.base_url) for _ in range(args.concurrency)]
+        for client in clients:
+            await client.register()
+            await client.login()
+
+        results = {}
+        for scenario in args.scenarios.split(","):
+            results[scenario] = await run_scenario(clients, scenario, args.duration)
+
+    print_report(results, args.baseline)
+    print(f"\nРезультаты сохранены в {save('load', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""
+Микробенчмарки горячих путей: JWT, хэширование паролей, валидация схем задач и crud aiohttp_server.
+
+Запуск из корня репозитория:
+    python -m benchmarks.micro [--postgres] [--iterations N] [--baseline benchmarks/results/micro-....json]
+
+Без --postgres crud работает с пулом в памяти (benchmarks.stand_ins.MemoryPool) и замеряются
+только накладные расходы crud. С --postgres используется пул aiohttp_server.database.create_pool(),
+схема должна быть создана миграциями, созданные задачи удаляются после замера.
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+from time import perf_counter
+from typing import Awaitable, Callable
+
+from benchmarks.results import print_report, save, summarize
+
+
+async def bench(func: Callable[[int], Awaitable], iterations: int, warmup: int = 10) -> dict:
+    """Вызывает func(i) последовательно iterations раз после прогрева и возвращает сводку по задержкам."""
+    for i in range(min(warmup, iterations)):
+        await func(i)
+    latencies = []
+    started = perf_counter()
+    for i in range(iterations):
+        call_started = perf_counter()
+        await func(i)
+        latencies.append(perf_counter() - call_started)
+    return summarize(latencies, perf_counter() - started)
+
+
+async def bench_jwt(iterations: int) -> dict:
+    from fastapi_app.auth.security import decode_jwt, encode_jwt
+
+    payload = {"type": "access", "sub": "1", "username": "benchmark"}
+    tokens = [await encode_jwt({**payload, "n": i}) for i in range(iterations + 10)]
+    token = tokens[0]
+    return {
+        "jwt.encode": await bench(lambda i: encode_jwt(payload), iterations),
+        # Каждый токен декодируется один раз, поэтому подпись проверяется без кэша
+        "jwt.decode_uncached": await bench(lambda i: decode_jwt(tokens[i]), iterations, warmup=0),
+        "jwt.decode_cached": await bench(lambda i: decode_jwt(token), iterations),
+    }
+
+
+async def bench_password(iterations: int) -> dict:
+    from fastapi_app.auth.hasher import password_hasher
+    from fastapi_app.auth.security import hash_password, validate_password
+
+    hashed = await hash_password("benchmark-password")
+    results = {
+        "password.hash": await bench(lambda i: hash_password("benchmark-password"), iterations, warmup=1),
+        "password.validate": await bench(
+            lambda i: validate_password("benchmark-password", hashed),
+            iterations,
+            warmup=1,
+        ),
+    }
+
+    async def validate_concurrently(i):
+        await asyncio.gather(*(validate_password("benchmark-password", hashed) for _ in range(8)))
+
+    results["password.validate_x8_concurrent"] = await bench(validate_concurrently, max(1, iterations // 8), warmup=1)
+    password_hasher.shutdown()
+    return results
+
+
+async def bench_schemas(iterations: int, batch_size: int) -> dict:
+    from fastapi_app.tasks.schema import ListTasksResponseSchema, TasksBatchCreateSchema, TaskSchema
+
+    task = {"title": "title", "description": "description" * 10, "status": "Добавлена"}
+    batch = {"tasks": [task] * batch_size}
+    page = {
+        "message": "ok",
+        "tasks": [{**task, "id": i, "user_id": 1} for i in range(batch_size)],
+        "next_cursor": "MTAwMA",
+    }
+
+    async def validate_task(i):
+        TaskSchema.model_validate(task)
+
+    async def validate_batch(i):
+        TasksBatchCreateSchema.model_validate(batch)
+
+    async def serialize_page(i):
+        ListTasksResponseSchema.model_validate(page).model_dump_json()
+
+    return {
+        "schema.task": await bench(validate_task, iterations),
+        f"schema.batch_create_{batch_size}": await bench(validate_batch, max(1, iterations // 10)),
+        f"schema.list_page_{batch_size}": await bench(serialize_page, max(1, iterations // 10)),
+    }
+
+
+async def bench_crud(iterations: int, batch_size: int, use_postgres: bool) -> dict:
+    from aiohttp_server import crud
+
+    if use_postgres:
+        from aiohttp_server.database import create_pool
+
+        pool = await create_pool()
+    else:
+        from benchmarks.stand_ins import MemoryPool
+
+        pool = MemoryPool()
+
+    task = {"title": "benchmark", "description": "benchmark task", "status": "Добавлена", "user_id": None}
+    created_ids = []
+
+    async def create(i):
+        created_ids.append((await crud.create_task(pool, dict(task)))["id"])
+
+    async def update(i):
+        task_id = created_ids[i % len(created_ids)]
+        updated = {"title": f"t{i}", "description": "updated", "status": "Выполнена", "id": task_id}
+        await crud.update_task(pool, updated)
+
+    async def create_batch(i):
+        created = await crud.create_tasks(pool, [task] * batch_size)
+        created_ids.extend(item["id"] for item in created)
+
+    try:
+        results = {
+            "crud.create_task": await bench(create, iterations),
+            "crud.get_tasks_100": await bench(lambda i: crud.get_tasks(pool, limit=100), iterations),
+            "crud.get_tasks_json_100": await bench(lambda i: crud.get_tasks_json(pool, limit=100), iterations),
+            "crud.get_tasks_version": await bench(lambda i: crud.get_tasks_version(pool), iterations),
+            "crud.update_task": await bench(update, iterations),
+            f"crud.create_tasks_{batch_size}": await bench(create_batch, max(1, iterations // 10), warmup=1),
+        }
+        ids = list(created_ids)
+
+        async def delete(i):
+            await crud.delete_task(pool, ids.pop())
+
+        results["crud.delete_task"] = await bench(delete, min(iterations, len(ids)))
+    finally:
+        if created_ids:
+            await crud.delete_tasks(pool, created_ids)
+        await pool.close()
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--password-iterations", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--postgres", action="store_true", help="crud на реальном PostgreSQL")
+    parser.add_argument("--baseline", type=Path, help="файл результатов для сравнения")
+    args = parser.parse_args()
+
+    results = {
+        **await bench_jwt(args.iterations),
+        **await bench_password(args.password_iterations),
+        **await bench_schemas(args.iterations, args.batch_size),
+        **await bench_crud(args.iterations, args.batch_size, args.postgres),
+    }
+    print_report(results, args.baseline)
+    print(f"\nРезультаты сохранены в {save('micro', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
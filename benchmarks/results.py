@@ -0,0 +1,70 @@
+import json
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль q (0-100) по методу ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    """Сводка по задержкам в секундах: p50/p99/среднее в мс и пропускная способность."""
+    if not latencies:
+        return {"count": 0, "errors": errors}
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(suite: str, results: dict, options: dict) -> Path:
+    """Сохраняет результаты в benchmarks/results/<suite>-<время>.json вместе с ревизией и окружением."""
+    RESULTS_DIR.mkdir(exist_ok=True)
+    now = datetime.now(timezone.utc)
+    path = RESULTS_DIR / f"{suite}-{now:%Y%m%dT%H%M%S}.json"
+    document = {
+        "suite": suite,
+        "created_at": now.isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "options": options,
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2, ensure_ascii=False, default=str))
+    return path
+
+
+def print_report(results: dict, baseline: Optional[Path] = None):
+    """Печатает таблицу результатов, при переданном baseline - с изменением p50 и p99 в процентах."""
+    previous = json.loads(baseline.read_text())["results"] if baseline else {}
+    print(f"{'name':<32} {'count':>8} {'p50 ms':>10} {'p99 ms':>10} {'rps':>10} {'errors':>7}")
+    for name, result in results.items():
+        line = (
+            f"{name:<32} {result['count']:>8} {result.get('p50_ms', '-'):>10} "
+            f"{result.get('p99_ms', '-'):>10} {result.get('throughput_rps', '-'):>10} {result['errors']:>7}"
+        )
+        if (old := previous.get(name)) and old.get("p50_ms") and result.get("p50_ms"):
+            p50 = (result["p50_ms"] / old["p50_ms"] - 1) * 100
+            p99 = (result["p99_ms"] / old["p99_ms"] - 1) * 100
+            line += f"   p50 {p50:+.1f}% p99 {p99:+.1f}%"
+        print(line)
@@ -0,0 +1,153 @@
+from contextlib import asynccontextmanager
+from itertools import count
+
+import orjson
+
+
+class MemoryStatement:
+    """Подготовленный запрос crud, выполняемый над задачами в памяти."""
+
+    def __init__(self, store: "MemoryStore", name: str):
+        self._store = store
+        self._name = name
+
+    async def fetch(self, *args):
+        return getattr(self._store, self._name)(*args)
+
+    async def fetchval(self, *args):
+        rows = getattr(self._store, self._name)(*args)
+        return next(iter(rows[0].values())) if rows else None
+
+    async def fetchrow(self, *args):
+        rows = getattr(self._store, self._name)(*args)
+        return rows[0] if rows else None
+
+    def cursor(self, *args, prefetch=None):
+        return self._iterate(getattr(self._store, self._name)(*args))
+
+    async def _iterate(self, rows):
+        for row in rows:
+            yield row
+
+
+class MemoryStore:
+    """Таблица задач в памяти, реализующая запросы aiohttp_server.queries, которые вызывает crud."""
+
+    def __init__(self):
+        self.tasks: dict[int, dict] = {}
+        self._ids = count(1)
+        self.version = 1
+
+    def tasks_version(self):
+        return [{"last_value": self.version}]
+
+    def bump_tasks_version(self):
+        self.version += 1
+        return [{"nextval": self.version}]
+
+    def get_task(self, task_id):
+        task = self.tasks.get(task_id)
+        return [dict(task)] if task else []
+
+    def create_task(self, title, description, status, user_id):
+        task_id = next(self._ids)
+        task = {"id": task_id, "title": title, "description": description, "status": status, "user_id": user_id}
+        self.tasks[task["id"]] = task
+        return [dict(task)]
+
+    def create_tasks(self, titles, descriptions, statuses, user_ids):
+        return [self.create_task(*values)[0] for values in zip(titles, descriptions, statuses, user_ids)]
+
+    def list_tasks(self, after_id, limit):
+        return [dict(task) for task in self.tasks.values() if task["id"] > after_id][:limit]
+
+    def list_tasks_by_status(self, status, after_id, limit):
+        tasks = (task for task in self.tasks.values() if task["id"] > after_id and task["status"] == status)
+        return [dict(task) for task, _ in zip(tasks, range(limit))]
+
+    @staticmethod
+    def _page_json(tasks, limit):
+        """Строка результата запросов *_json, которую в Postgres собирает TASKS_PAGE_JSON."""
+        page = tasks[: limit - 1]
+        return [
+            {
+                "tasks": orjson.dumps(page).decode(),
+                "has_more": len(tasks) == limit,
+                "cursor": orjson.dumps([page[-1]["id"]]).decode() if page else None,
+            }
+        ]
+
+    def list_tasks_json(self, after_id, limit):
+        return self._page_json(self.list_tasks(after_id, limit), limit)
+
+    def list_tasks_by_status_json(self, status, after_id, limit):
+        return self._page_json(self.list_tasks_by_status(status, after_id, limit), limit)
+
+    def stream_tasks(self):
+        return [{"task": orjson.dumps(task).decode()} for task in self.tasks.values()]
+
+    def stream_tasks_by_status(self, status):
+        return [{"task": orjson.dumps(task).decode()} for task in self.tasks.values() if task["status"] == status]
+
+    def update_task(self, title, description, status, task_id):
+        if task := self.tasks.get(task_id):
+            values = {"title": title, "description": description, "status": status}
+            task.update({key: value for key, value in values.items() if value is not None})
+            return [dict(task)]
+        return []
+
+    def update_tasks(self, ids, titles, descriptions, statuses):
+        updated = []
+        for task_id, title, description, status in zip(ids, titles, descriptions, statuses):
+            if task := self.tasks.get(task_id):
+                values = {"title": title, "description": description, "status": status}
+                task.update({key: value for key, value in values.items() if value is not None})
+                updated.append(dict(task))
+        return updated
+
+    def delete_task(self, task_id):
+        task = self.tasks.pop(task_id, None)
+        return [task] if task else []
+
+    def delete_tasks(self, task_ids):
+        return [task for task_id in task_ids if (task := self.tasks.pop(task_id, None))]
+
+
+class MemoryConnection:
+    def __init__(self, store: MemoryStore):
+        self._store = store
+
+    def statement(self, name: str) -> MemoryStatement:
+        return MemoryStatement(self._store, name)
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class MemoryPool:
+    """
+    Замена пула asyncpg для микробенчмарков crud без PostgreSQL.
+
+    Замеряет накладные расходы crud (получение соединения, метрики, преобразование
+    строк), но не работу базы данных.
+    """
+
+    def __init__(self):
+        self.store = MemoryStore()
+        self._conn = MemoryConnection(self.store)
+
+    async def acquire(self, timeout=None):
+        return self._conn
+
+    async def release(self, conn):
+        pass
+
+    def get_size(self) -> int:
+        return 1
+
+    def get_idle_size(self) -> int:
+        return 1
+
+    async def close(self):
+        pass
@@ -0,0 +1,127 @@
+import zlib
+from typing import Optional
+
+from config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Уже сжатые форматы (изображения, архивы) повторно не сжимаются
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/msgpack", "text/")
+
+
+class GzipEncoder:
+    def __init__(self):
+        self._obj = zlib.compressobj(settings.compression.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=settings.compression.brotli_quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=settings.compression.zstd_level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+ENCODERS = {"gzip": GzipEncoder}
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def parse_accept_encoding(accept_encoding: str) -> dict[str, float]:
+    """Алгоритмы из Accept-Encoding с их весами q."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.strip().split(";")
+        q = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            weights[name.lower()] = q
+    return weights
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Алгоритм сжатия ответа по заголовку Accept-Encoding клиента или None.
+
+    Выбирается алгоритм с наибольшим весом q, при равных весах - по порядку
+    settings.compression.encodings. q=0 запрещает алгоритм, * задает вес остальных.
+    """
+    if not settings.compression.enabled or not accept_encoding:
+        return None
+    weights = parse_accept_encoding(accept_encoding)
+    default = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in settings.compression.encodings:
+        q = weights.get(encoding, default)
+        if encoding in ENCODERS and q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def create_encoder(encoding: str):
+    """
+    Потоковый кодировщик с методами compress, flush и finish.
+
+    flush после каждой части потокового ответа позволяет клиенту распаковать ее,
+    не дожидаясь следующих, finish завершает сжатый поток.
+    """
+    return ENCODERS[encoding]()
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    encoder = create_encoder(encoding)
+    return encoder.compress(data) + encoder.finish()
+
+
+def weaken_etag(etag: str) -> str:
+    """Сжатое представление отличается побайтно от исходного, поэтому сильный ETag становится слабым."""
+    return etag if etag.startswith("W/") else f"W/{etag}"
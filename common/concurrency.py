@@ -0,0 +1,120 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import Callable
+
+from prometheus_client import Counter, Gauge
+
+LIMITER_LIMIT = Gauge("concurrency_limit", "Текущий адаптивный предел одновременных запросов", ["limiter"])
+LIMITER_IN_FLIGHT = Gauge("concurrency_in_flight", "Выполняющиеся запросы", ["limiter"])
+LIMITER_QUEUE = Gauge("concurrency_queue", "Запросы в очереди ожидания", ["limiter"])
+LIMITER_REJECTED = Counter("concurrency_rejected_total", "Отклоненные из-за перегрузки запросы", ["limiter"])
+
+
+class LimitExceeded(Exception):
+    def __init__(self, limiter: str, retry_after: float):
+        super().__init__(f"Concurrency limit of {limiter} exceeded")
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """
+    Адаптивный ограничитель одновременных запросов (AIMD).
+
+    Предел растет на 1/limit после каждого запроса быстрее latency_target и
+    умножается на backoff_ratio после медленного запроса или перегрузки, которую
+    определяет is_overload по исключению. Уменьшает предел только запрос, начатый
+    после предыдущего уменьшения, иначе пачка одновременных медленных запросов
+    обрушила бы его до min_limit. Сверх предела запросы ждут в очереди
+    не дольше queue_timeout, при полной очереди или истечении ожидания
+    выбрасывается LimitExceeded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        max_queue: int,
+        queue_timeout: float,
+        latency_target: float,
+        backoff_ratio: float,
+        is_overload: Callable[[BaseException], bool] = lambda error: True,
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.is_overload = is_overload
+        self.in_flight = 0
+        self._last_decrease = float("-inf")
+        self._waiters: deque[asyncio.Future] = deque()
+        LIMITER_LIMIT.labels(name).set(self.limit)
+
+    def _reject(self):
+        LIMITER_REJECTED.labels(self.name).inc()
+        raise LimitExceeded(self.name, retry_after=max(self.queue_timeout, 1))
+
+    async def _wait_for_slot(self):
+        if len(self._waiters) >= self.max_queue:
+            self._reject()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        LIMITER_QUEUE.labels(self.name).set(len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            LIMITER_QUEUE.labels(self.name).set(len(self._waiters))
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject()
+            raise
+
+    def _release(self):
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+        LIMITER_IN_FLIGHT.labels(self.name).set(self.in_flight)
+        LIMITER_QUEUE.labels(self.name).set(len(self._waiters))
+
+    def _adjust(self, started: float, overloaded: bool):
+        now = monotonic()
+        if overloaded or now - started > self.latency_target:
+            # Запросы, начатые до прошлого уменьшения, видели прежний предел и уже учтены им
+            if started > self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self._last_decrease = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        LIMITER_LIMIT.labels(self.name).set(self.limit)
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+        else:
+            await self._wait_for_slot()
+        LIMITER_IN_FLIGHT.labels(self.name).set(self.in_flight)
+
+        started = monotonic()
+        try:
+            yield
+        except Exception as e:
+            self._adjust(started, overloaded=self.is_overload(e))
+            raise
+        else:
+            self._adjust(started, overloaded=False)
+        finally:
+            self._release()
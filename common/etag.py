@@ -0,0 +1,22 @@
+import hashlib
+from typing import Optional
+
+
+def make_etag(version, *parts) -> str:
+    """
+    Сильный ETag представления из версии коллекции задач и параметров запроса.
+
+    Версия меняется после каждой записи в коллекцию, поэтому тело ответа для вычисления
+    ETag не нужно. parts должны однозначно определять представление (параметры, формат).
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Совпадает ли ETag с одним из значений If-None-Match (слабое сравнение, как требует RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
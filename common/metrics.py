@@ -0,0 +1,55 @@
+import asyncio
+from contextlib import contextmanager
+from time import perf_counter
+
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, Histogram, generate_latest
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_seconds",
+    "Время обработки HTTP-запросов по маршрутам",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Обрабатываемые HTTP-запросы", ["method", "route"])
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "Задержка срабатывания таймера цикла событий относительно запланированного времени",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+# Маршрут для запросов, не совпавших ни с одним маршрутом, чтобы не плодить метки по произвольным путям
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@contextmanager
+def observe_request(method: str, route: str):
+    """
+    Учитывает запрос в in-flight и замеряет его время до выхода из блока.
+
+    Статус ответа записывается в возвращаемый словарь под ключом "status", по умолчанию 500.
+    """
+    in_flight = REQUESTS_IN_FLIGHT.labels(method, route)
+    in_flight.inc()
+    outcome = {"status": 500}
+    started = perf_counter()
+    try:
+        yield outcome
+    finally:
+        REQUEST_SECONDS.labels(method, route, str(outcome["status"])).observe(perf_counter() - started)
+        in_flight.dec()
+
+
+async def monitor_event_loop_lag(interval: float):
+    """Раз в interval секунд замеряет, насколько позже запланированного просыпается цикл событий."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(loop.time() - started - interval, 0))
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Метрики процесса в текстовом формате Prometheus и их Content-Type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
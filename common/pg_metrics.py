@@ -0,0 +1,101 @@
+import logging
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import Optional
+
+import asyncpg
+from prometheus_client import Gauge, Histogram
+
+from common.tracing import tracer
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+POOL_ACQUIRE_SECONDS = Histogram(
+    "pg_pool_acquire_seconds",
+    "Время ожидания свободного соединения пула asyncpg",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+POOL_CONNECTIONS = Gauge("pg_pool_connections", "Соединения пула asyncpg по состоянию", ["state"])
+QUERY_SECONDS = Histogram(
+    "pg_query_seconds",
+    "Время выполнения запросов к PostgreSQL",
+    ["query"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+
+def update_pool_gauges(pool: asyncpg.Pool):
+    size, idle = pool.get_size(), pool.get_idle_size()
+    POOL_CONNECTIONS.labels("in_use").set(size - idle)
+    POOL_CONNECTIONS.labels("idle").set(idle)
+
+
+@asynccontextmanager
+async def acquire(pool: asyncpg.Pool, timeout: Optional[float] = None):
+    """pool.acquire() с замером ожидания соединения и учетом занятых и свободных соединений."""
+    started = perf_counter()
+    with tracer.start_as_current_span("pg.acquire"):
+        conn = await pool.acquire(timeout=timeout or settings.postgres.pool_acquire_timeout)
+    try:
+        POOL_ACQUIRE_SECONDS.observe(perf_counter() - started)
+        update_pool_gauges(pool)
+        yield conn
+    finally:
+        await pool.release(conn)
+    update_pool_gauges(pool)
+
+
+@asynccontextmanager
+async def observe_query(name: str, conn: Optional[asyncpg.Connection] = None, query: str = None, args=()):
+    """
+    Замеряет время запроса с меткой name.
+
+    Запросы дольше slow_query_threshold_ms попадают в журнал, а при включенном
+    slow_query_explain и переданных conn и query - вместе с планом EXPLAIN.
+    """
+    started = perf_counter()
+    try:
+        with tracer.start_as_current_span(f"pg.query {name}", attributes={"db.system": "postgresql"}):
+            yield
+    finally:
+        elapsed = perf_counter() - started
+        QUERY_SECONDS.labels(name).observe(elapsed)
+
+    threshold = settings.postgres.slow_query_threshold_ms
+    if not threshold or elapsed * 1000 < threshold:
+        return
+    if settings.postgres.slow_query_explain and conn is not None and query:
+        try:
+            plan = await conn.fetch(f"EXPLAIN {query}", *args)
+        except asyncpg.PostgresError:
+            logger.warning("Slow query %s: %.1f ms, EXPLAIN failed", name, elapsed * 1000, exc_info=True)
+            return
+        plan_text = "\n".join(row[0] for row in plan)
+        logger.warning("Slow query %s: %.1f ms\n%s", name, elapsed * 1000, plan_text)
+    else:
+        logger.warning("Slow query %s: %.1f ms", name, elapsed * 1000)
+
+
+class TimedStatement:
+    """Запрос из кэша подготовленных запросов соединения, выполнение которого замеряется через observe_query."""
+
+    def __init__(self, conn: asyncpg.Connection, name: str, query: str):
+        self._conn = conn
+        self._name = name
+        self._query = query
+
+    async def fetch(self, *args):
+        async with observe_query(self._name, self._conn, self._query, args):
+            return await self._conn.fetch(self._query, *args)
+
+    async def fetchrow(self, *args):
+        async with observe_query(self._name, self._conn, self._query, args):
+            return await self._conn.fetchrow(self._query, *args)
+
+    async def fetchval(self, *args):
+        async with observe_query(self._name, self._conn, self._query, args):
+            return await self._conn.fetchval(self._query, *args)
+
+    def cursor(self, *args, prefetch: Optional[int] = None):
+        return self._conn.cursor(self._query, *args, prefetch=prefetch)
@@ -0,0 +1,52 @@
+import asyncio
+import hmac
+import random
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Mapping
+
+from config import settings
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_FILE_HEADER = "X-Profile-File"
+
+
+def should_profile(headers: Mapping[str, str]) -> bool:
+    """Профилировать ли запрос: по заголовку X-Profile с токеном settings.profiling.token или по sample_rate."""
+    token = settings.profiling.token
+    if token and (value := headers.get(PROFILE_HEADER)):
+        return hmac.compare_digest(value.encode(), token.encode())
+    return settings.profiling.sample_rate > 0 and random.random() < settings.profiling.sample_rate
+
+
+def profile_path(service: str, method: str, route: str) -> Path:
+    name = re.sub(r"[^\w]+", "_", f"{method}{route}").strip("_")
+    return Path(settings.profiling.output_dir, f"{service}-{datetime.now():%Y%m%dT%H%M%S%f}-{name}.speedscope.json")
+
+
+def write_profile(profiler, path: Path):
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(profiler.output(renderer=SpeedscopeRenderer()))
+
+
+@asynccontextmanager
+async def profile_request(path: Path):
+    """
+    Профилирует выполнение блока в текущей задаче и сохраняет профиль в path в формате speedscope.
+
+    Профилировщик pyinstrument работает в асинхронном режиме: время ожидания в await
+    попадает в профиль отдельными кадрами, а не теряется. Файл пишется в отдельном потоке.
+    """
+    from pyinstrument import Profiler
+
+    profiler = Profiler(interval=settings.profiling.interval, async_mode="enabled")
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        await asyncio.to_thread(write_profile, profiler, path)
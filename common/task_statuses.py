@@ -0,0 +1,7 @@
+from typing import Literal, get_args
+
+# Справочник task_statuses заполняется этими статусами миграцией 6 и из запросов не пополняется,
+# новый статус добавляется сюда и новой миграцией.
+TaskStatus = Literal["Добавлена", "В работе", "Выполнена"]
+TASK_STATUSES: frozenset[str] = frozenset(get_args(TaskStatus))
+DEFAULT_TASK_STATUS: TaskStatus = "Добавлена"
@@ -0,0 +1,89 @@
+import functools
+from contextlib import contextmanager
+from typing import Mapping, Optional
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+from config import settings
+
+# Пока setup_tracing не вызван или трассировка выключена, спаны ничего не записывают
+tracer = trace.get_tracer("managing_tasks")
+
+_provider: Optional[TracerProvider] = None
+
+
+def create_exporter() -> SpanExporter:
+    if settings.tracing.exporter == "file":
+        out = open(settings.tracing.file_path, "a")
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+    return OTLPSpanExporter(endpoint=settings.tracing.otlp_endpoint)
+
+
+def setup_tracing(service_name: str):
+    """
+    Включает запись спанов процесса, если settings.tracing.enabled.
+
+    Доля записываемых трасс задается sample_ratio, решение о записи продолжения
+    чужой трассы берется из заголовка traceparent вызывающего сервиса.
+    """
+    global _provider
+    if not settings.tracing.enabled or _provider is not None:
+        return
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing.sample_ratio)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(create_exporter()))
+    trace.set_tracer_provider(_provider)
+
+
+def shutdown_tracing():
+    """Отправляет накопленные спаны и останавливает экспорт."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def inject_context(headers: dict) -> dict:
+    """Добавляет в заголовки контекст текущей трассы (traceparent) для вызываемого сервиса."""
+    propagate.inject(headers)
+    return headers
+
+
+def extract_context(headers):
+    """Контекст трассы вызывающего сервиса из заголовков запроса."""
+    return propagate.extract(headers)
+
+
+@contextmanager
+def server_span(method: str, route: str, headers: Mapping[str, str]):
+    """Серверный спан обработки запроса, продолжающий трассу вызывающего сервиса из заголовков."""
+    if _provider is None:
+        yield trace.INVALID_SPAN
+        return
+    with tracer.start_as_current_span(
+        f"{method} {route}",
+        context=extract_context(headers),
+        kind=trace.SpanKind.SERVER,
+        attributes={"http.request.method": method, "http.route": route},
+    ) as span:
+        yield span
+
+
+def traced(name: str):
+    """Выполняет асинхронную функцию в дочернем спане с именем name."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,12 +1,28 @@
 from os import getenv
 from pathlib import Path
+from typing import Literal, Optional
 
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class AiohttpSettings(BaseSettings):
     host: str = "aiohttp"
     port: int = 8080
+    # Путь к Unix-сокету, если FastAPI и aiohttp_server работают на одном хосте
+    # (в docker-compose каталог сокета должен быть общим томом обоих сервисов).
+    unix_socket: Optional[str] = None
+    body_format: Literal["json", "msgpack"] = "json"
+    request_timeout: float = 5.0
+    connector_limit: int = 100
+    connector_limit_per_host: int = 100
+    keepalive_timeout: float = 30.0
+    dns_cache_ttl: int = 300
+    retry_attempts: int = 2
+    retry_backoff_base: float = 0.05
+    retry_backoff_max: float = 1.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 10.0
 
 
 class PostgresSettings(BaseSettings):
@@ -15,6 +31,27 @@ class PostgresSettings(BaseSettings):
     database: str = getenv("POSTGRES_DB", "task")
     user: str = getenv("POSTGRES_USER", "admin")
     password: str = getenv("POSTGRES_PASSWORD", "admin")
+    pool_min_size: int = 2
+    pool_max_size: int = 10
+    pool_acquire_timeout: float = 5.0
+    # Кэш подготовленных запросов каждого соединения, в нем же хранятся запросы crud (aiohttp_server.queries)
+    statement_cache_size: int = 100
+    max_inactive_connection_lifetime: float = 300.0
+    command_timeout: float = 30.0
+    server_settings: dict[str, str] = {"jit": "off"}
+    slow_query_threshold_ms: float = 500.0
+    slow_query_explain: bool = False
+
+    def pool_kwargs(self) -> dict:
+        """Параметры asyncpg.create_pool."""
+        return {
+            "min_size": self.pool_min_size,
+            "max_size": self.pool_max_size,
+            "statement_cache_size": self.statement_cache_size,
+            "max_inactive_connection_lifetime": self.max_inactive_connection_lifetime,
+            "command_timeout": self.command_timeout,
+            "server_settings": self.server_settings,
+        }
 
 
 class RedisSettings(BaseSettings):
@@ -28,21 +65,153 @@ class FastAPISettings(BaseSettings):
     version: str = "1.0.1"
 
 
+class TasksSettings(BaseSettings):
+    default_page_size: int = 100
+    max_page_size: int = 1000
+    stream_prefetch: int = 500
+    stream_chunk_size: int = 64 * 1024
+    max_batch_size: int = 5000
+    max_search_query_length: int = 200
+
+
 class AuthJWT(BaseSettings):
     private_key_path: Path = Path("fastapi_app", "certs", "private.pem").resolve()
     public_key_path: Path = Path("fastapi_app", "certs", "public.pem").resolve()
-    algorithm: str = "RS256"
+    algorithm: Literal["RS256", "EdDSA"] = "RS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 30
+    verified_token_cache_size: int = 10_000
+    bcrypt_rounds: int = 12
+    password_hash_executor: Literal["thread", "process"] = "thread"
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 256
+
+
+class TaskEventsSettings(BaseSettings):
+    # Размер очереди подписчика, при переполнении медленный подписчик отключается
+    queue_size: int = 1000
+    keepalive_seconds: float = 15.0
+    # Сколько пропущенных событий отдается при возобновлении по Last-Event-ID
+    resume_limit: int = 1000
+    retention_hours: int = 24
+    cleanup_interval_seconds: float = 600.0
+
+
+class TaskListCacheSettings(BaseSettings):
+    enabled: bool = True
+    ttl_seconds: int = 30
+    max_entry_bytes: int = 1024 * 1024
+    # Объем записей, сохраняемых за ttl_seconds, в Redis одновременно живут записи не больше чем за два окна
+    max_window_bytes: int = 64 * 1024 * 1024
+
+
+class ConcurrencyLimitSettings(BaseSettings):
+    initial_limit: int = 20
+    min_limit: int = 2
+    max_limit: int = 200
+    max_queue: int = 100
+    queue_timeout: float = 1.0
+    latency_target: float = 0.25
+    backoff_ratio: float = 0.9
+    # Одновременные потоковые выгрузки NDJSON: каждая держит соединение пула и курсор до конца
+    stream_limit: int = 4
+
+    def limiter_kwargs(self) -> dict:
+        """Параметры common.concurrency.AdaptiveLimiter."""
+        return self.model_dump(exclude={"stream_limit"})
+
+    def stream_limiter_kwargs(self) -> dict:
+        """Параметры AdaptiveLimiter с постоянным пределом stream_limit."""
+        return dict(
+            self.limiter_kwargs(),
+            initial_limit=self.stream_limit,
+            min_limit=self.stream_limit,
+            max_limit=self.stream_limit,
+        )
+
+
+class RateLimit(BaseModel):
+    # Скорость пополнения (токенов в секунду) и емкость корзины
+    rate: float
+    burst: int
+
+
+class RateLimitSettings(BaseSettings):
+    enabled: bool = True
+    # Доля емкости корзины, которую процесс забирает из Redis за раз и расходует локально
+    lease_fraction: float = 0.1
+    lease_ttl: float = 1.0
+    max_local_buckets: int = 10_000
+    routes: dict[str, RateLimit] = {
+        "tasks": RateLimit(rate=20, burst=40),
+        "login": RateLimit(rate=0.2, burst=5),
+        "register": RateLimit(rate=0.1, burst=3),
+    }
+
+
+class TracingSettings(BaseSettings):
+    enabled: bool = False
+    # Доля трасс, которые начинаются в этом сервисе и записываются (0.0 - 1.0)
+    sample_ratio: float = 0.1
+    # otlp - отправка в коллектор по OTLP/HTTP, file - JSON-строки в файл file_path
+    exporter: Literal["otlp", "file"] = "otlp"
+    otlp_endpoint: str = "http://otel-collector:4318/v1/traces"
+    file_path: Path = Path("traces.jsonl")
+
+
+class ProfilingSettings(BaseSettings):
+    # Без enabled middleware профилирования не подключается
+    enabled: bool = False
+    # Значение заголовка X-Profile, по которому профилируется запрос (None - только по sample_rate)
+    token: Optional[str] = None
+    sample_rate: float = 0.0
+    interval: float = 0.001
+    output_dir: Path = Path("profiles")
+
+
+class CompressionSettings(BaseSettings):
+    enabled: bool = True
+    # Ответы меньше min_size байт не сжимаются, потоковые ответы сжимаются всегда
+    min_size: int = 1024
+    # Алгоритмы в порядке предпочтения сервера, недоступные без brotli/zstandard пропускаются
+    encodings: list[Literal["zstd", "br", "gzip"]] = ["zstd", "br", "gzip"]
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    zstd_level: int = 3
+    # Запрашивать сжатые ответы у aiohttp_server (на одной машине сжатие только тратит CPU)
+    upstream: bool = True
+
+
+class MetricsSettings(BaseSettings):
+    # Период замера задержки цикла событий в секундах
+    event_loop_lag_interval: float = 0.5
+
+
+class UserCacheSettings(BaseSettings):
+    max_size: int = 10_000
+    ttl_seconds: int = 60
+    use_redis: bool = False
 
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(case_sensitive=False)
+    # remote - задачи через HTTP в aiohttp_server, local - crud aiohttp_server в процессе FastAPI
+    tasks_backend: Literal["remote", "local"] = "remote"
     aiohttp: AiohttpSettings = AiohttpSettings()
     postgres: PostgresSettings = PostgresSettings()
     fastapi: FastAPISettings = FastAPISettings()
     redis: RedisSettings = RedisSettings()
     auth_jwt: AuthJWT = AuthJWT()
+    tasks: TasksSettings = TasksSettings()
+    user_cache: UserCacheSettings = UserCacheSettings()
+    task_list_cache: TaskListCacheSettings = TaskListCacheSettings()
+    task_events: TaskEventsSettings = TaskEventsSettings()
+    concurrency_limit: ConcurrencyLimitSettings = ConcurrencyLimitSettings()
+    rate_limit: RateLimitSettings = RateLimitSettings()
+    metrics: MetricsSettings = MetricsSettings()
+    tracing: TracingSettings = TracingSettings()
+    profiling: ProfilingSettings = ProfilingSettings()
+    compression: CompressionSettings = CompressionSettings()
 
 
 settings = Settings()
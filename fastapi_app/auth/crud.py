@@ -2,7 +2,10 @@ from typing import Optional
 
 import asyncpg
 
-from fastapi_app.auth.schema import UserDBSchema
+from common.pg_metrics import observe_query
+from fastapi_app.auth.schema import AuthUserSchema, UserDBSchema
+from fastapi_app.auth.user_cache import user_cache
+from fastapi_app.database.pg_accessor import db
 
 
 async def get_user(conn: asyncpg.Connection, username: str) -> Optional[UserDBSchema]:
@@ -10,7 +13,8 @@ async def get_user(conn: asyncpg.Connection, username: str) -> Optional[UserDBSc
         SELECT * FROM users
         WHERE username = $1
     """
-    record = await conn.fetchrow(query, username)
+    async with observe_query("get_user", conn, query, (username,)):
+        record = await conn.fetchrow(query, username)
     if record:
         return UserDBSchema(**dict(record))
 
@@ -18,10 +22,35 @@ async def get_user(conn: asyncpg.Connection, username: str) -> Optional[UserDBSc
 
 
 async def create_user(conn: asyncpg.Connection, username: str, password_hash: bytes) -> str:
+    """
+    Создает пользователя и сбрасывает его запись в кэше.
+
+    Запись могла остаться от пользователя с тем же именем, удаленного в обход приложения.
+    """
     query = """
         INSERT INTO users (username, password_hash)
         VALUES ($1, $2)
         ON CONFLICT (username) DO NOTHING
         RETURNING username;
     """
-    return await conn.fetchval(query, username, password_hash)
+    async with observe_query("create_user", conn, query, (username, password_hash)):
+        created = await conn.fetchval(query, username, password_hash)
+    if created:
+        await user_cache.invalidate(username)
+    return created
+
+
+async def get_user_cached(username: str) -> Optional[AuthUserSchema]:
+    """
+    Возвращает пользователя из кэша, при промахе загружает его из базы данных.
+
+    Изменения пользователя в базе данных в обход приложения видны не позже settings.user_cache.ttl_seconds.
+    """
+    if user := await user_cache.get(username):
+        return user
+
+    async for conn in db.get_conn():
+        user = await get_user(conn=conn, username=username)
+    if user:
+        await user_cache.set(user)
+    return user
@@ -0,0 +1,87 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+from fastapi import HTTPException, status
+from prometheus_client import Counter, Gauge
+
+from config import settings
+
+PASSWORD_HASH_IN_FLIGHT = Gauge("password_hash_in_flight", "Выполняющиеся операции bcrypt")
+PASSWORD_HASH_WAITING = Gauge("password_hash_waiting", "Операции bcrypt, ожидающие свободного исполнителя")
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Операции bcrypt, отклоненные с 503 из-за переполнения очереди ожидания",
+)
+
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _checkpw(password: bytes, hashed_password: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed_password)
+
+
+class PasswordHasher:
+    """Выполняет bcrypt в ограниченном пуле потоков или процессов, не блокируя цикл событий."""
+
+    def __init__(self, executor: str, workers: int, max_queue: int, rounds: int):
+        self.executor_type = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.waiting = 0
+        self.running = 0
+        self._executor: Optional[Executor] = None
+        self._semaphore = asyncio.Semaphore(workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            executor_class = ProcessPoolExecutor if self.executor_type == "process" else ThreadPoolExecutor
+            self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self.waiting >= self.max_queue:
+            PASSWORD_HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервис перегружен, повторите попытку позже",
+            )
+        self.waiting += 1
+        PASSWORD_HASH_WAITING.inc()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+            PASSWORD_HASH_WAITING.dec()
+        self.running += 1
+        PASSWORD_HASH_IN_FLIGHT.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.running -= 1
+            PASSWORD_HASH_IN_FLIGHT.dec()
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> bytes:
+        return await self._run(_hashpw, password.encode(), self.rounds)
+
+    async def verify(self, password: str, hashed_password: bytes) -> bool:
+        return await self._run(_checkpw, password.encode(), hashed_password)
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor=settings.auth_jwt.password_hash_executor,
+    workers=settings.auth_jwt.password_hash_workers,
+    max_queue=settings.auth_jwt.password_hash_max_queue,
+    rounds=settings.auth_jwt.bcrypt_rounds,
+)
@@ -8,11 +8,13 @@ from redis import Redis
 
 from config import settings
 from fastapi_app.auth.crud import create_user, get_user
-from fastapi_app.auth.schema import RegisterResponseSchema, TokensSchema, UserDBSchema, UserSchema
+from fastapi_app.auth.schema import AuthUserSchema, RegisterResponseSchema, TokensSchema, UserSchema
 from fastapi_app.auth.security import create_access_token, create_refresh_token, hash_password, validate_password
+from fastapi_app.auth.user_cache import user_cache
 from fastapi_app.auth.validation import get_current_auth_user_for_refresh
 from fastapi_app.database.pg_accessor import db
 from fastapi_app.database.redis_accessor import redis_client
+from fastapi_app.rate_limit.dependencies import limit_by_ip
 
 security = HTTPBasic()
 http_bearer = HTTPBearer(auto_error=False)
@@ -24,6 +26,7 @@ auth_router = APIRouter(tags=["auth"], dependencies=[Depends(http_bearer)])
     summary="Регистрация нового пользователя",
     status_code=201,
     response_model=RegisterResponseSchema,
+    dependencies=[Depends(limit_by_ip("register"))],
 )
 async def register_user_endpoint(
     conn: Annotated[asyncpg.Connection, Depends(db.get_conn)],
@@ -48,6 +51,7 @@ async def register_user_endpoint(
     summary="Выдача токенов по логину и паролю",
     status_code=200,
     response_model=TokensSchema,
+    dependencies=[Depends(limit_by_ip("login"))],
 )
 async def login(
     response: Response,
@@ -64,6 +68,7 @@ async def login(
 
     if not await validate_password(password=form_data.password, hashed_password=db_user.password_hash):
         raise unauthed_exc
+    await user_cache.set(db_user)
     access_token = await create_access_token(db_user)
     refresh_token = await create_refresh_token(db_user)
     expire_delta = settings.auth_jwt.refresh_token_expire_days * 24 * 60 * 60
@@ -89,7 +94,7 @@ async def login(
 )
 async def refresh(
     response: Response,
-    user: UserDBSchema = Depends(get_current_auth_user_for_refresh),
+    user: AuthUserSchema = Depends(get_current_auth_user_for_refresh),
 ):
     access_token = await create_access_token(user)
     return {"access_token": access_token}
@@ -1,14 +1,19 @@
 from pydantic import BaseModel, ConfigDict
 
 
-class UserDBSchema(BaseModel):
+class AuthUserSchema(BaseModel):
+    """Поля пользователя, нужные для аутентификации запросов, без хэша пароля."""
+
     id: int
     username: str
-    password_hash: bytes
 
     model_config = ConfigDict(strict=True)
 
 
+class UserDBSchema(AuthUserSchema):
+    password_hash: bytes
+
+
 class UserSchema(BaseModel):
     username: str
     password: str
@@ -1,29 +1,70 @@
 import datetime
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
 
-import bcrypt
 import jwt
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
 from fastapi import HTTPException, status
 from jwt import InvalidTokenError
 
 from config import settings
-from fastapi_app.auth.schema import UserDBSchema
+from fastapi_app.auth.hasher import password_hasher
+from fastapi_app.auth.schema import AuthUserSchema
+
+
+PRIVATE_KEY = load_pem_private_key(settings.auth_jwt.private_key_path.read_bytes(), password=None)
+PUBLIC_KEY = load_pem_public_key(settings.auth_jwt.public_key_path.read_bytes())
+
+
+class VerifiedTokenCache:
+    """Ограниченный кэш payload проверенных токенов по SHA-256 токена, запись живет до exp токена."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def _digest(token: str | bytes) -> bytes:
+        return hashlib.sha256(token.encode() if isinstance(token, str) else token).digest()
+
+    def get(self, token: str | bytes) -> Optional[dict]:
+        digest = self._digest(token)
+        if entry := self._entries.get(digest):
+            expires_at, payload = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(digest)
+                return payload.copy()
+            del self._entries[digest]
+        return None
+
+    def set(self, token: str | bytes, payload: dict):
+        if not (expires_at := payload.get("exp")):
+            return
+        digest = self._digest(token)
+        self._entries[digest] = (expires_at, payload.copy())
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+verified_tokens = VerifiedTokenCache(max_size=settings.auth_jwt.verified_token_cache_size)
 
 
 async def hash_password(password: str) -> bytes:
-    """Хэширует пароль с помощью bcrypt."""
-    salt = bcrypt.gensalt()
-    pwd_bytes: bytes = password.encode()
-    return bcrypt.hashpw(pwd_bytes, salt)
+    """Хэширует пароль с помощью bcrypt в пуле исполнителей."""
+    return await password_hasher.hash(password)
 
 
 async def validate_password(password: str, hashed_password: bytes) -> bool:
-    """Проверяет, совпадает ли обычный пароль с хэшированным."""
-    return bcrypt.checkpw(password.encode(), hashed_password)
+    """Проверяет, совпадает ли обычный пароль с хэшированным, в пуле исполнителей."""
+    return await password_hasher.verify(password, hashed_password)
 
 
 async def encode_jwt(
     payload: dict,
-    private_key: str = settings.auth_jwt.private_key_path.read_text(),
+    private_key=PRIVATE_KEY,
     algorithm: str = settings.auth_jwt.algorithm,
     expire_minutes: int = settings.auth_jwt.access_token_expire_minutes,
     expire_timedelta: datetime.timedelta | None = None,
@@ -41,18 +82,28 @@ async def encode_jwt(
 
 async def decode_jwt(
     token: str | bytes,
-    public_key: str = settings.auth_jwt.public_key_path.read_text(),
+    public_key=PUBLIC_KEY,
     algorithm: str = settings.auth_jwt.algorithm,
 ) -> dict:
-    """Декодирует токен публичным ключом."""
+    """Декодирует токен публичным ключом, повторно не проверяя подпись уже проверенных токенов."""
+    invalid_token_exc = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Недействительный токен",
+    )
+    if not token:
+        raise invalid_token_exc
+
+    use_cache = public_key is PUBLIC_KEY and algorithm == settings.auth_jwt.algorithm
+    if use_cache and (cached := verified_tokens.get(token)):
+        return cached
+
     try:
         decoded = jwt.decode(token, public_key, algorithms=[algorithm])
     except InvalidTokenError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Недействительный токен",
-        )
+        raise invalid_token_exc
 
+    if use_cache:
+        verified_tokens.set(token, decoded)
     return decoded
 
 
@@ -72,7 +123,7 @@ async def create_token(
     )
 
 
-async def create_access_token(user: UserDBSchema) -> str:
+async def create_access_token(user: AuthUserSchema) -> str:
     """Создает токен доступа."""
     jwt_payload = {"sub": user.id, "username": user.username}
     return await create_token(
@@ -82,7 +133,7 @@ async def create_access_token(user: UserDBSchema) -> str:
     )
 
 
-async def create_refresh_token(user: UserDBSchema) -> str:
+async def create_refresh_token(user: AuthUserSchema) -> str:
     """Создает токен обновления."""
     jwt_payload = {"sub": user.id, "username": user.username}
     return await create_token(
@@ -0,0 +1,89 @@
+import logging
+from collections import OrderedDict
+from time import monotonic
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from config import settings
+from fastapi_app.auth.schema import AuthUserSchema
+from fastapi_app.database.redis_accessor import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """
+    LRU-кэш пользователей с ограниченным временем жизни записей.
+
+    Хранятся только поля, нужные для аутентификации (AuthUserSchema), хэш пароля в кэш не попадает.
+    При включенном use_redis записи дополнительно хранятся в Redis и доступны всем процессам
+    приложения, при недоступности Redis кэш работает только в памяти процесса. Код, изменяющий
+    или удаляющий пользователя, сбрасывает запись через invalidate, изменения в обход
+    приложения видны не позже ttl.
+    """
+
+    def __init__(self, max_size: int, ttl: int, use_redis: bool):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self._entries: OrderedDict[str, tuple[float, AuthUserSchema]] = OrderedDict()
+
+    @staticmethod
+    def _redis_key(username: str) -> str:
+        return f"user:{username}"
+
+    def _store(self, user: AuthUserSchema):
+        self._entries[user.username] = (monotonic() + self.ttl, user)
+        self._entries.move_to_end(user.username)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, username: str) -> Optional[AuthUserSchema]:
+        if entry := self._entries.get(username):
+            expires_at, user = entry
+            if expires_at > monotonic():
+                self._entries.move_to_end(username)
+                return user
+            del self._entries[username]
+
+        if self.use_redis:
+            try:
+                redis = await redis_client()
+                raw = await redis.get(self._redis_key(username)) if redis else None
+            except RedisError:
+                logger.warning("User cache is unavailable in Redis", exc_info=True)
+                return None
+            if raw:
+                user = AuthUserSchema.model_validate_json(raw)
+                self._store(user)
+                return user
+
+        return None
+
+    async def set(self, user: AuthUserSchema):
+        user = AuthUserSchema(id=user.id, username=user.username)
+        self._store(user)
+        if self.use_redis:
+            try:
+                if redis := await redis_client():
+                    await redis.set(self._redis_key(user.username), user.model_dump_json(), ex=self.ttl)
+            except RedisError:
+                logger.warning("User cache is unavailable in Redis", exc_info=True)
+
+    async def invalidate(self, username: str):
+        """Удаляет запись пользователя из памяти процесса и из Redis."""
+        self._entries.pop(username, None)
+        if self.use_redis:
+            try:
+                if redis := await redis_client():
+                    await redis.delete(self._redis_key(username))
+            except RedisError:
+                logger.warning("User cache is unavailable in Redis", exc_info=True)
+
+
+user_cache = UserCache(
+    max_size=settings.user_cache.max_size,
+    ttl=settings.user_cache.ttl_seconds,
+    use_redis=settings.user_cache.use_redis,
+)
@@ -1,20 +1,20 @@
 from datetime import datetime
-from typing import Annotated, Optional
+from typing import Optional
 
-import asyncpg
 from fastapi import Cookie, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from redis import Redis
 
-from fastapi_app.auth.crud import get_user
-from fastapi_app.auth.schema import UserDBSchema
+from common.tracing import traced
+from fastapi_app.auth.crud import get_user_cached
+from fastapi_app.auth.schema import AuthUserSchema
 from fastapi_app.auth.security import decode_jwt
-from fastapi_app.database.pg_accessor import db
 from fastapi_app.database.redis_accessor import redis_client
 
 oauth_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+@traced("auth.decode_token")
 async def get_current_token_pyload(
     token: str = Depends(oauth_scheme),
 ) -> dict:
@@ -22,11 +22,11 @@ async def get_current_token_pyload(
     return await decode_jwt(token=token)
 
 
+@traced("auth.current_user")
 async def get_current_auth_user(
-    conn: Annotated[asyncpg.Connection, Depends(db.get_conn)],
     payload: dict = Depends(get_current_token_pyload),
-) -> UserDBSchema:
-    """Получение пользователя по payload"""
+) -> AuthUserSchema:
+    """Получение пользователя по payload, без обращения к базе данных при попадании в кэш"""
     token_type = payload.get("type")
     if token_type != "access":
         raise HTTPException(
@@ -35,22 +35,22 @@ async def get_current_auth_user(
         )
     username: Optional[str] = payload.get("username")
     if username:
-        if user := await get_user(conn=conn, username=username):
+        if (user := await get_user_cached(username)) and str(user.id) == str(payload.get("sub")):
             return user
 
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Недействительный токен")
 
 
+@traced("auth.refresh_user")
 async def get_current_auth_user_for_refresh(
-    conn: Annotated[asyncpg.Connection, Depends(db.get_conn)],
     refresh_token: str = Cookie(None),
     redis: Redis = Depends(redis_client),
-) -> UserDBSchema:
+) -> AuthUserSchema:
     """Получение пользователя по payload и проверка подлинности его refresh токена"""
     payload: dict = await decode_jwt(token=refresh_token)
     username: Optional[str] = payload.get("username")
     if username:
-        if user := await get_user(conn=conn, username=username):
+        if user := await get_user_cached(username):
             original_refresh_token = await redis.get(str(user.id))
             original_pyload = await decode_jwt(token=original_refresh_token)
             exp_time = original_pyload.get("exp")
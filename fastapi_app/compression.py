@@ -0,0 +1,70 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.compression import choose_encoding, create_encoder, is_compressible, weaken_etag
+from config import settings
+
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware, сжимающее ответы алгоритмом, согласованным по Accept-Encoding.
+
+    Ответ целиком меньше settings.compression.min_size не сжимается. Потоковые ответы
+    (NDJSON, Server-Sent Events) сжимаются по частям, каждая часть сразу отправляется клиенту.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        encoder = None
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, encoder
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+
+            if start_message is not None:
+                start, start_message = start_message, None
+                body, more_body = message.get("body", b""), message.get("more_body", False)
+                headers = MutableHeaders(scope=start)
+                compressible = (
+                    start["status"] not in (204, 304)
+                    and "content-encoding" not in headers
+                    and is_compressible(headers.get("content-type"))
+                )
+                if not compressible or (not more_body and len(body) < settings.compression.min_size):
+                    await send(start)
+                    return await send(message)
+
+                encoder = create_encoder(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["ETag"] = weaken_etag(headers["etag"])
+                if more_body:
+                    del headers["Content-Length"]
+                    body = encoder.compress(body) + encoder.flush()
+                else:
+                    body = encoder.compress(body) + encoder.finish()
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                return await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+            if encoder is None:
+                return await send(message)
+            body, more_body = message.get("body", b""), message.get("more_body", False)
+            body = encoder.compress(body) + (encoder.flush() if more_body else encoder.finish())
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
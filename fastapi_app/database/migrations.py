@@ -0,0 +1,282 @@
+"""
+Версионированные миграции схемы базы данных.
+
+Применение: python -m fastapi_app.database.migrations
+"""
+
+import asyncio
+import logging
+from typing import NamedTuple
+
+import asyncpg
+
+from fastapi_app.database.pg_accessor import db
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_LOCK_ID = 7_351_204
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    sql: str
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=1,
+        name="create users and tasks",
+        sql="""
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                username VARCHAR(255) UNIQUE NOT NULL,
+                password_hash BYTEA NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS tasks (
+                id SERIAL PRIMARY KEY,
+                title VARCHAR(255) NOT NULL,
+                description TEXT,
+                status VARCHAR(255) NOT NULL DEFAULT 'new',
+                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE
+            );
+        """,
+    ),
+    Migration(
+        version=2,
+        name="task status codes and indexes",
+        sql="""
+            CREATE TABLE task_statuses (
+                id SMALLSERIAL PRIMARY KEY,
+                name VARCHAR(255) UNIQUE NOT NULL
+            );
+
+            INSERT INTO task_statuses (name)
+            SELECT DISTINCT status FROM tasks
+            UNION
+            SELECT 'new';
+
+            CREATE FUNCTION task_status_id(status_name VARCHAR) RETURNS SMALLINT
+            LANGUAGE plpgsql STRICT AS $$
+            DECLARE
+                found_id SMALLINT;
+            BEGIN
+                SELECT id INTO found_id FROM task_statuses WHERE name = status_name;
+                IF found_id IS NULL THEN
+                    INSERT INTO task_statuses (name) VALUES (status_name)
+                    ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+                    RETURNING id INTO found_id;
+                END IF;
+                RETURN found_id;
+            END;
+            $$;
+
+            ALTER TABLE tasks ADD COLUMN status_id SMALLINT REFERENCES task_statuses(id);
+            UPDATE tasks SET status_id = s.id FROM task_statuses s WHERE s.name = tasks.status;
+            ALTER TABLE tasks DROP COLUMN status;
+            ALTER TABLE tasks
+                ALTER COLUMN status_id SET NOT NULL,
+                ALTER COLUMN status_id SET DEFAULT task_status_id('new');
+
+            CREATE INDEX tasks_user_id_status_id_id_idx ON tasks (user_id, status_id, id);
+            CREATE INDEX tasks_status_id_id_idx ON tasks (status_id, id);
+        """,
+    ),
+    Migration(
+        version=3,
+        name="task full-text search",
+        sql="""
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+            ALTER TABLE tasks ADD COLUMN search TSVECTOR GENERATED ALWAYS AS (
+                setweight(to_tsvector('russian', coalesce(title, '')), 'A')
+                || setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+            ) STORED;
+
+            CREATE INDEX tasks_search_idx ON tasks USING GIN (search);
+            CREATE INDEX tasks_title_trgm_idx ON tasks USING GIN (title gin_trgm_ops);
+        """,
+    ),
+    Migration(
+        version=4,
+        name="task change events",
+        sql="""
+            CREATE TABLE task_events (
+                id BIGSERIAL PRIMARY KEY,
+                operation VARCHAR(6) NOT NULL,
+                task_id INTEGER NOT NULL,
+                user_id INTEGER,
+                status VARCHAR(255),
+                task JSONB,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            CREATE INDEX task_events_created_at_idx ON task_events (created_at);
+
+            -- Триггеры уровня оператора пишут по событию на каждую измененную задачу
+            -- и одним уведомлением сообщают диапазон id записанных событий.
+            CREATE FUNCTION record_task_events() RETURNS TRIGGER
+            LANGUAGE plpgsql AS $$
+            DECLARE
+                first_id BIGINT;
+                last_id BIGINT;
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    WITH events AS (
+                        INSERT INTO task_events (operation, task_id, user_id, status)
+                        SELECT 'delete', o.id, o.user_id, s.name
+                        FROM old_rows o JOIN task_statuses s ON s.id = o.status_id
+                        ORDER BY o.id
+                        RETURNING id
+                    )
+                    SELECT min(id), max(id) INTO first_id, last_id FROM events;
+                ELSE
+                    WITH events AS (
+                        INSERT INTO task_events (operation, task_id, user_id, status, task)
+                        SELECT lower(TG_OP), n.id, n.user_id, s.name, jsonb_build_object(
+                            'id', n.id,
+                            'title', n.title,
+                            'description', n.description,
+                            'status', s.name,
+                            'user_id', n.user_id
+                        )
+                        FROM new_rows n JOIN task_statuses s ON s.id = n.status_id
+                        ORDER BY n.id
+                        RETURNING id
+                    )
+                    SELECT min(id), max(id) INTO first_id, last_id FROM events;
+                END IF;
+                IF first_id IS NOT NULL THEN
+                    PERFORM pg_notify('task_events', first_id || ':' || last_id);
+                END IF;
+                RETURN NULL;
+            END;
+            $$;
+
+            CREATE TRIGGER tasks_insert_events AFTER INSERT ON tasks
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION record_task_events();
+            CREATE TRIGGER tasks_update_events AFTER UPDATE ON tasks
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION record_task_events();
+            CREATE TRIGGER tasks_delete_events AFTER DELETE ON tasks
+                REFERENCING OLD TABLE AS old_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION record_task_events();
+        """,
+    ),
+    Migration(
+        version=5,
+        name="tasks collection version",
+        sql="""
+            -- Увеличивается crud после завершения каждой записи в tasks, last_value служит версией для ETag
+            CREATE SEQUENCE tasks_version_seq;
+        """,
+    ),
+    Migration(
+        version=6,
+        name="fixed task statuses",
+        sql="""
+            -- Фиксированный набор статусов (common.task_statuses), статусы, записанные раньше,
+            -- остаются в справочнике, чтобы не потерять данные существующих задач
+            INSERT INTO task_statuses (name) VALUES ('Добавлена'), ('В работе'), ('Выполнена')
+            ON CONFLICT (name) DO NOTHING;
+
+            -- Неизвестный статус больше не добавляется в справочник, а является ошибкой
+            CREATE OR REPLACE FUNCTION task_status_id(status_name VARCHAR) RETURNS SMALLINT
+            LANGUAGE plpgsql STABLE STRICT AS $$
+            DECLARE
+                found_id SMALLINT;
+            BEGIN
+                SELECT id INTO found_id FROM task_statuses WHERE name = status_name;
+                IF found_id IS NULL THEN
+                    RAISE EXCEPTION 'Unknown task status: %', status_name USING ERRCODE = 'invalid_parameter_value';
+                END IF;
+                RETURN found_id;
+            END;
+            $$;
+
+            ALTER TABLE tasks ALTER COLUMN status_id SET DEFAULT task_status_id('Добавлена');
+        """,
+    ),
+    Migration(
+        version=7,
+        name="task events transaction ids",
+        sql="""
+            -- id событий выдаются при записи и не совпадают с порядком фиксации транзакций,
+            -- поток событий читает их по снимкам (pg_visible_in_snapshot) по id транзакции
+            ALTER TABLE task_events ADD COLUMN xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+            CREATE INDEX task_events_xid_idx ON task_events (xid);
+        """,
+    ),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+async def get_schema_version(conn: asyncpg.Connection) -> int:
+    """Возвращает номер последней примененной миграции или 0 для пустой базы."""
+    if not await conn.fetchval("SELECT to_regclass('schema_migrations')"):
+        return 0
+    return await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+
+
+async def migrate(conn: asyncpg.Connection) -> list[int]:
+    """Применяет недостающие миграции в одной транзакции под advisory-блокировкой."""
+    applied = []
+    async with conn.transaction():
+        await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATIONS_LOCK_ID)
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """
+        )
+        current_version = await get_schema_version(conn)
+        for migration in MIGRATIONS:
+            if migration.version <= current_version:
+                continue
+            logger.info("Applying migration %s: %s", migration.version, migration.name)
+            await conn.execute(migration.sql)
+            await conn.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)",
+                migration.version,
+                migration.name,
+            )
+            applied.append(migration.version)
+    return applied
+
+
+async def check_schema_version():
+    """
+    Проверяет при запуске приложения, что схема базы данных не отстает от кода.
+
+    Используется отдельное соединение: пул создается позже бэкендом задач, и его init
+    уже может рассчитывать на таблицы последней версии схемы.
+    """
+    conn = await asyncpg.connect(db.database_url)
+    try:
+        current_version = await get_schema_version(conn)
+    finally:
+        await conn.close()
+    if current_version < SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current_version} is older than {SCHEMA_VERSION}, "
+            "run `python -m fastapi_app.database.migrations`"
+        )
+
+
+async def main():
+    try:
+        async for conn in db.get_conn():
+            applied = await migrate(conn)
+    finally:
+        await db.disconnect()
+    logger.info("Applied migrations: %s", applied or "none")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,5 +1,6 @@
 import asyncpg
 
+from common.pg_metrics import acquire
 from config import settings
 
 DATABASE_URL = "postgresql://{user}:{password}@{host}:{port}/{db}".format(
@@ -14,48 +15,32 @@ DATABASE_URL = "postgresql://{user}:{password}@{host}:{port}/{db}".format(
 class PostgresAccessor:
     """Класс для работы с базой данных PostgreSQL + asyncpg."""
 
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, connection_class=asyncpg.Connection, init=None):
         self.database_url = database_url
+        self.connection_class = connection_class
+        self.init = init
         self.pool = None
 
     async def get_conn(self):
         if not self.pool:
             await self.connect()
-        async with self.pool.acquire() as conn:
+        async with acquire(self.pool) as conn:
             yield conn
 
-    async def connect(self):
-        self.pool = await asyncpg.create_pool(self.database_url)
+    async def connect(self, connection_class=None, init=None):
+        """Создает пул, connection_class и init, переданные явно, заменяют заданные в конструкторе."""
+        self.pool = await asyncpg.create_pool(
+            self.database_url,
+            connection_class=connection_class or self.connection_class,
+            init=init or self.init,
+            **settings.postgres.pool_kwargs(),
+        )
 
     async def disconnect(self):
-        await self.pool.close()
-        self.pool = None
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
 
 
 db = PostgresAccessor(database_url=DATABASE_URL)
 
-
-async def create_tables():
-    """Создает таблицы users и tasks."""
-    async for conn in db.get_conn():
-        await conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                username VARCHAR(255) UNIQUE NOT NULL,
-                password_hash BYTEA NOT NULL
-            )
-        """
-        )
-
-        await conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS tasks (
-                id SERIAL PRIMARY KEY,
-                title VARCHAR(255) NOT NULL,
-                description TEXT,
-                status VARCHAR(255) NOT NULL DEFAULT 'new',
-                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE
-            )
-        """
-        )
@@ -1,10 +1,33 @@
+from time import perf_counter
 from typing import Optional
 
-import redis.asyncio as aioredis
+from prometheus_client import Histogram
 from redis.asyncio import Redis
 
+from common.metrics import LATENCY_BUCKETS
+from common.tracing import tracer
 from config import settings
 
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_command_seconds",
+    "Время выполнения команд Redis",
+    ["command"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+class InstrumentedRedis(Redis):
+    """Клиент Redis, замеряющий время и записывающий спан каждой команды (кроме команд в pipeline)."""
+
+    async def execute_command(self, *args, **options):
+        command = str(args[0]).upper()
+        started = perf_counter()
+        try:
+            with tracer.start_as_current_span(f"redis {command}", attributes={"db.system": "redis"}):
+                return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(command).observe(perf_counter() - started)
+
 
 class AsyncRedisClient:
     _client: Optional[Redis] = None
@@ -12,7 +35,7 @@ class AsyncRedisClient:
     @classmethod
     async def initialize(cls):
         if cls._client is None:
-            cls._client = await aioredis.from_url(
+            cls._client = await InstrumentedRedis.from_url(
                 f"redis://{settings.redis.host}:{settings.redis.port}",
                 max_connections=20,
                 encoding="utf8",
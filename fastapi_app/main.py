@@ -1,25 +1,40 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 
+from common.metrics import monitor_event_loop_lag
+from common.tracing import setup_tracing, shutdown_tracing
 from config import settings
+from fastapi_app.auth.hasher import password_hasher
 from fastapi_app.auth.routes import auth_router
-from fastapi_app.database.pg_accessor import create_tables, db
+from fastapi_app.compression import CompressionMiddleware
+from fastapi_app.database.migrations import check_schema_version
+from fastapi_app.database.pg_accessor import db
 from fastapi_app.database.redis_accessor import close_async_redis_client, set_async_redis_client
-from fastapi_app.tasks.aiohttp_client import aiohttp_client, create_aiohttp_client
+from fastapi_app.metrics import MetricsMiddleware, metrics_router
+from fastapi_app.profiling import ProfilingMiddleware
+from fastapi_app.tasks.backend import task_backend
+from fastapi_app.tasks.events import task_event_listener
 from fastapi_app.tasks.routes import tasks_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await create_tables()
+    setup_tracing("fastapi_app")
+    await check_schema_version()
+    await task_backend.startup()
     await set_async_redis_client()
-    await create_aiohttp_client()
+    loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag(settings.metrics.event_loop_lag_interval))
     yield
-    await aiohttp_client.close()
+    loop_lag_monitor.cancel()
+    await task_event_listener.stop()
+    await task_backend.shutdown()
     await db.disconnect()
     await close_async_redis_client()
+    password_hasher.shutdown()
+    shutdown_tracing()
 
 
 main_app = FastAPI(
@@ -30,5 +45,11 @@ main_app = FastAPI(
     version=settings.fastapi.version,
 )
 
+main_app.add_middleware(CompressionMiddleware)
+main_app.add_middleware(MetricsMiddleware)
+if settings.profiling.enabled:
+    main_app.add_middleware(ProfilingMiddleware)
+
+main_app.include_router(metrics_router)
 main_app.include_router(auth_router, prefix="/auth")
 main_app.include_router(tasks_router, prefix="/tasks")
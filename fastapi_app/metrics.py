@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Response
+from starlette.datastructures import Headers
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.metrics import UNMATCHED_ROUTE, observe_request, render_metrics
+from common.tracing import server_span
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    body, content_type = render_metrics()
+    return Response(content=body, headers={"Content-Type": content_type})
+
+
+def route_template(scope: Scope) -> str:
+    """Шаблон пути маршрута, которому соответствует запрос, например /tasks/{task_id}/."""
+    partial = None
+    for route in scope["app"].routes:
+        match, child_scope = route.matches(scope)
+        path = getattr(child_scope.get("route", route), "path", None)
+        if match == Match.FULL:
+            return path or UNMATCHED_ROUTE
+        if match == Match.PARTIAL and partial is None:
+            partial = path
+    return partial or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, замеряющее время обработки и число выполняющихся запросов по шаблону маршрута.
+
+    Время потоковых ответов считается до отправки последней части тела. Каждый запрос
+    также записывается серверным спаном трассы, если трассировка включена.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method, route = scope["method"], route_template(scope)
+        with observe_request(method, route) as outcome, server_span(method, route, Headers(scope=scope)) as span:
+
+            async def send_with_status(message: Message):
+                if message["type"] == "http.response.start":
+                    outcome["status"] = message["status"]
+                    span.set_attribute("http.response.status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
@@ -0,0 +1,31 @@
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.profiling import PROFILE_FILE_HEADER, profile_path, profile_request, should_profile
+from fastapi_app.metrics import route_template
+
+
+class ProfilingMiddleware:
+    """
+    ASGI-middleware, профилирующее отдельные запросы, выбранные should_profile.
+
+    Имя файла профиля возвращается клиенту в заголовке X-Profile-File.
+    Подключается только при settings.profiling.enabled.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not should_profile(Headers(scope=scope)):
+            return await self.app(scope, receive, send)
+
+        path = profile_path("fastapi_app", scope["method"], route_template(scope))
+
+        async def send_with_profile_name(message: Message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((PROFILE_FILE_HEADER.lower().encode(), path.name.encode()))
+            await send(message)
+
+        async with profile_request(path):
+            await self.app(scope, receive, send_with_profile_name)
@@ -0,0 +1,35 @@
+from fastapi import Depends, HTTPException, Request, status
+
+from fastapi_app.auth.schema import AuthUserSchema
+from fastapi_app.auth.validation import get_current_auth_user
+from fastapi_app.rate_limit.limiter import RateLimitExceeded, rate_limiter
+
+
+async def check_rate_limit(route: str, identity: str):
+    try:
+        await rate_limiter.check(route, identity)
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Слишком много запросов",
+            headers={"Retry-After": str(int(e.retry_after))},
+        )
+
+
+def limit_by_user(route: str):
+    """Зависимость, ограничивающая частоту запросов текущего пользователя к route."""
+
+    async def dependency(user: AuthUserSchema = Depends(get_current_auth_user)):
+        await check_rate_limit(route, f"user:{user.id}")
+
+    return dependency
+
+
+def limit_by_ip(route: str):
+    """Зависимость, ограничивающая частоту запросов с IP-адреса клиента к route (для маршрутов без токена)."""
+
+    async def dependency(request: Request):
+        host = request.client.host if request.client else "unknown"
+        await check_rate_limit(route, f"ip:{host}")
+
+    return dependency
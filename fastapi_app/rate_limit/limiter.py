@@ -0,0 +1,131 @@
+import logging
+import math
+from collections import OrderedDict
+from time import monotonic
+
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+
+from config import RateLimit, settings
+from fastapi_app.database.redis_accessor import redis_client
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_DECISIONS = Counter(
+    "rate_limit_decisions_total",
+    "Решения ограничителя частоты: local - по локальной аренде, redis - после обращения к Redis",
+    ["route", "source", "allowed"],
+)
+
+# Корзина хранится в хэше {tokens, ts}, время берется из Redis, чтобы не зависеть от часов процессов.
+# Скрипт выдает не больше requested токенов из доступных и время до появления следующего токена.
+TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+local retry_after = 0
+if granted == 0 then
+    retry_after = (1 - tokens) / rate
+end
+return {granted, tostring(retry_after)}
+"""
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, route: str, retry_after: float):
+        super().__init__(f"Rate limit of {route} exceeded")
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов на корзинах токенов в Redis.
+
+    Токены списываются атомарно Lua-скриптом. Чтобы не обращаться к Redis на каждый
+    запрос, процесс забирает из корзины сразу до lease_fraction ее емкости и расходует
+    их локально в течение lease_ttl, неизрасходованные токены пропадают. При
+    недоступности Redis запросы пропускаются.
+    """
+
+    key_prefix = "rate"
+
+    def __init__(
+        self,
+        enabled: bool,
+        routes: dict[str, RateLimit],
+        lease_fraction: float,
+        lease_ttl: float,
+        max_local_buckets: int,
+    ):
+        self.enabled = enabled
+        self.routes = routes
+        self.lease_fraction = lease_fraction
+        self.lease_ttl = lease_ttl
+        self.max_local_buckets = max_local_buckets
+        self._leases: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._script = None
+
+    def _take_leased(self, key: str) -> bool:
+        tokens, expires_at = self._leases.get(key, (0, 0.0))
+        if tokens <= 0 or expires_at <= monotonic():
+            self._leases.pop(key, None)
+            return False
+        self._leases[key] = (tokens - 1, expires_at)
+        return True
+
+    def _store_lease(self, key: str, tokens: int):
+        if tokens <= 0:
+            return
+        self._leases[key] = (tokens, monotonic() + self.lease_ttl)
+        self._leases.move_to_end(key)
+        while len(self._leases) > self.max_local_buckets:
+            self._leases.popitem(last=False)
+
+    async def _acquire_from_redis(self, key: str, limit: RateLimit, requested: int) -> tuple[int, float]:
+        redis = await redis_client()
+        if self._script is None:
+            self._script = redis.register_script(TOKEN_BUCKET)
+        granted, retry_after = await self._script(keys=[key], args=[limit.rate, limit.burst, requested], client=redis)
+        return int(granted), float(retry_after)
+
+    async def check(self, route: str, identity: str):
+        """Списывает токен из корзины route для identity или выбрасывает RateLimitExceeded."""
+        limit = self.routes.get(route)
+        if not self.enabled or limit is None:
+            return
+
+        key = f"{self.key_prefix}:{route}:{identity}"
+        if self._take_leased(key):
+            RATE_LIMIT_DECISIONS.labels(route, "local", "true").inc()
+            return
+
+        requested = max(1, int(limit.burst * self.lease_fraction))
+        try:
+            granted, retry_after = await self._acquire_from_redis(key, limit, requested)
+        except RedisError:
+            logger.warning("Rate limiter is unavailable", exc_info=True)
+            return
+
+        RATE_LIMIT_DECISIONS.labels(route, "redis", str(granted > 0).lower()).inc()
+        if not granted:
+            raise RateLimitExceeded(route, retry_after=max(math.ceil(retry_after), 1))
+        self._store_lease(key, granted - 1)
+
+
+rate_limiter = RateLimiter(
+    enabled=settings.rate_limit.enabled,
+    routes=settings.rate_limit.routes,
+    lease_fraction=settings.rate_limit.lease_fraction,
+    lease_ttl=settings.rate_limit.lease_ttl,
+    max_local_buckets=settings.rate_limit.max_local_buckets,
+)
@@ -1,7 +1,26 @@
 from typing import Optional
 
 import aiohttp
-from aiohttp import ClientSession
+import orjson
+from aiohttp import BaseConnector, ClientSession
+
+from config import settings
+
+
+def create_connector() -> BaseConnector:
+    """Создает коннектор к aiohttp_server: Unix-сокет, если он задан, иначе TCP с пулом keep-alive соединений."""
+    if settings.aiohttp.unix_socket:
+        return aiohttp.UnixConnector(
+            path=settings.aiohttp.unix_socket,
+            limit=settings.aiohttp.connector_limit,
+            keepalive_timeout=settings.aiohttp.keepalive_timeout,
+        )
+    return aiohttp.TCPConnector(
+        limit=settings.aiohttp.connector_limit,
+        limit_per_host=settings.aiohttp.connector_limit_per_host,
+        keepalive_timeout=settings.aiohttp.keepalive_timeout,
+        ttl_dns_cache=settings.aiohttp.dns_cache_ttl,
+    )
 
 
 class AiohttpClientSession:
@@ -11,10 +30,15 @@ class AiohttpClientSession:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._client = ClientSession(timeout=aiohttp.ClientTimeout(total=5))
         return cls._instance
 
     async def get_client(self) -> ClientSession:
+        if self._client is None or self._client.closed:
+            AiohttpClientSession._client = ClientSession(
+                connector=create_connector(),
+                timeout=aiohttp.ClientTimeout(total=settings.aiohttp.request_timeout),
+                json_serialize=lambda obj: orjson.dumps(obj).decode(),
+            )
         return self._client
 
     async def close(self):
@@ -0,0 +1,111 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
+
+from config import settings
+from fastapi_app.tasks.aiohttp_client import aiohttp_client
+from fastapi_app.tasks.make_request import make_request, stream_request
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+class TaskBackend(ABC):
+    """Хранилище задач, с которым работает роутер задач."""
+
+    async def startup(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    @abstractmethod
+    async def list_tasks(self, params: dict) -> dict:
+        """Страница задач по параметрам status, cursor, limit: {"tasks": [...], "next_cursor": ...}."""
+
+    @abstractmethod
+    async def get_task(self, task_id: int) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def search_tasks(self, params: dict) -> dict:
+        """Страница задач, найденных по тексту q, по параметрам q, status, cursor, limit."""
+
+    @abstractmethod
+    async def stream_tasks(self, status: Optional[str]) -> AsyncIterator[bytes]:
+        """Все задачи с указанным статусом в формате NDJSON."""
+
+    @abstractmethod
+    async def create_task(self, task: dict) -> dict: ...
+
+    @abstractmethod
+    async def create_tasks(self, tasks: list[dict]) -> list[dict]: ...
+
+    @abstractmethod
+    async def update_task(self, task: dict) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def update_tasks(self, tasks: list[dict]) -> list[Optional[dict]]: ...
+
+    @abstractmethod
+    async def delete_task(self, task_id: int) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def delete_tasks(self, task_ids: list[int]) -> list[Optional[dict]]: ...
+
+
+class RemoteTaskBackend(TaskBackend):
+    """Задачи хранятся в aiohttp_server, запросы отправляются по HTTP."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    async def startup(self):
+        await aiohttp_client.get_client()
+
+    async def shutdown(self):
+        await aiohttp_client.close()
+
+    async def list_tasks(self, params: dict) -> dict:
+        return await make_request("GET", self.base_url, params=params)
+
+    async def get_task(self, task_id: int) -> Optional[dict]:
+        return await make_request("GET", f"{self.base_url}/{task_id}")
+
+    async def search_tasks(self, params: dict) -> dict:
+        return await make_request("GET", f"{self.base_url}/search", params=params)
+
+    async def stream_tasks(self, status: Optional[str]) -> AsyncIterator[bytes]:
+        params = {"status": status} if status else {}
+        return await stream_request("GET", self.base_url, params=params, headers={"Accept": NDJSON_CONTENT_TYPE})
+
+    async def create_task(self, task: dict) -> dict:
+        return await make_request("POST", self.base_url, json=task)
+
+    async def create_tasks(self, tasks: list[dict]) -> list[dict]:
+        return await make_request("POST", f"{self.base_url}/batch", json=tasks)
+
+    async def update_task(self, task: dict) -> Optional[dict]:
+        return await make_request("PUT", self.base_url, json=task)
+
+    async def update_tasks(self, tasks: list[dict]) -> list[Optional[dict]]:
+        return await make_request("PUT", f"{self.base_url}/batch", json=tasks)
+
+    async def delete_task(self, task_id: int) -> Optional[dict]:
+        return await make_request("DELETE", f"{self.base_url}/{task_id}")
+
+    async def delete_tasks(self, task_ids: list[int]) -> list[Optional[dict]]:
+        return await make_request("DELETE", f"{self.base_url}/batch", json=task_ids)
+
+
+def create_task_backend() -> TaskBackend:
+    """Создает хранилище задач, выбранное в settings.tasks_backend."""
+    if settings.tasks_backend == "local":
+        from fastapi_app.tasks.local_backend import LocalTaskBackend
+
+        return LocalTaskBackend()
+    return RemoteTaskBackend(base_url=f"http://{settings.aiohttp.host}:{settings.aiohttp.port}/tasks")
+
+
+task_backend = create_task_backend()
+
+
+async def get_task_backend() -> TaskBackend:
+    return task_backend
@@ -0,0 +1,142 @@
+import hashlib
+import logging
+from typing import Awaitable, Callable, Optional
+
+import orjson
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+
+from config import settings
+from fastapi_app.database.redis_accessor import redis_client
+
+logger = logging.getLogger(__name__)
+
+TASK_LIST_CACHE_REQUESTS = Counter(
+    "task_list_cache_requests_total",
+    "Обращения к кэшу списков задач: hit, miss или error при недоступности Redis",
+    ["result"],
+)
+TASK_LIST_CACHE_SKIPPED = Counter(
+    "task_list_cache_skipped_total",
+    "Ответы, не сохраненные в кэш: too_large - больше max_entry_bytes, budget - исчерпан объем окна",
+    ["reason"],
+)
+
+# Записывает ответ, только если объем записей за текущее окно длиной ttl не превысит бюджет.
+# Окно начинается с первой записи после истечения счетчика KEYS[1].
+STORE_WITHIN_BUDGET = """
+local size = tonumber(ARGV[2])
+local used = redis.call('INCRBY', KEYS[1], size)
+if used == size then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+if used > tonumber(ARGV[4]) then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[3])
+return 1
+"""
+
+
+class TaskListCache:
+    """
+    Кэш ответов списка задач в Redis.
+
+    Ключ записи содержит текущую версию коллекции задач, которую увеличивает каждая
+    операция записи, поэтому устаревшие записи не читаются и удаляются Redis по TTL.
+    При недоступности Redis запросы выполняются без кэша.
+
+    Все записи живут под префиксом tasks:list, за каждое окно длиной ttl сохраняется
+    не больше max_window_bytes, поэтому кэш занимает в Redis не больше 2 * max_window_bytes.
+    """
+
+    version_key = "tasks:version"
+    key_prefix = "tasks:list"
+    budget_key = "tasks:list:budget"
+
+    def __init__(self, enabled: bool, ttl: int, max_entry_bytes: int, max_window_bytes: int):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+        self.max_window_bytes = max_window_bytes
+        self._script = None
+
+    def _key(self, version: str, params: dict) -> str:
+        digest = hashlib.sha1(orjson.dumps(params, option=orjson.OPT_SORT_KEYS)).hexdigest()
+        return f"{self.key_prefix}:{version}:{digest}"
+
+    async def version(self) -> Optional[str]:
+        """Текущая версия коллекции задач или None, если кэш выключен или Redis недоступен."""
+        if not self.enabled:
+            return None
+        try:
+            redis = await redis_client()
+            return await redis.get(self.version_key) or "0"
+        except RedisError:
+            logger.warning("Task list cache is unavailable", exc_info=True)
+            return None
+
+    async def get_or_fetch(
+        self,
+        params: dict,
+        fetch: Callable[[], Awaitable[dict]],
+        version: Optional[str] = None,
+    ) -> dict:
+        """
+        Возвращает ответ из кэша по параметрам запроса, при промахе получает его через fetch и сохраняет.
+
+        Уже прочитанную версию коллекции можно передать в version, чтобы не запрашивать ее повторно.
+        """
+        if not self.enabled:
+            return await fetch()
+
+        try:
+            redis = await redis_client()
+            if version is None:
+                version = await redis.get(self.version_key) or "0"
+            key = self._key(version, params)
+            if cached := await redis.get(key):
+                TASK_LIST_CACHE_REQUESTS.labels("hit").inc()
+                return orjson.loads(cached)
+        except RedisError:
+            logger.warning("Task list cache is unavailable", exc_info=True)
+            TASK_LIST_CACHE_REQUESTS.labels("error").inc()
+            return await fetch()
+
+        TASK_LIST_CACHE_REQUESTS.labels("miss").inc()
+        result = await fetch()
+        payload = orjson.dumps(result)
+        if len(payload) > self.max_entry_bytes:
+            TASK_LIST_CACHE_SKIPPED.labels("too_large").inc()
+            return result
+        try:
+            if self._script is None:
+                self._script = redis.register_script(STORE_WITHIN_BUDGET)
+            stored = await self._script(
+                keys=[self.budget_key, key],
+                args=[payload, len(payload), self.ttl, self.max_window_bytes],
+                client=redis,
+            )
+            if not stored:
+                TASK_LIST_CACHE_SKIPPED.labels("budget").inc()
+        except RedisError:
+            logger.warning("Task list cache is unavailable", exc_info=True)
+        return result
+
+    async def invalidate(self):
+        """Увеличивает версию коллекции задач, делая недоступными все сохраненные списки."""
+        if not self.enabled:
+            return
+        try:
+            redis = await redis_client()
+            await redis.incr(self.version_key)
+        except RedisError:
+            logger.warning("Task list cache is unavailable", exc_info=True)
+
+
+task_list_cache = TaskListCache(
+    enabled=settings.task_list_cache.enabled,
+    ttl=settings.task_list_cache.ttl_seconds,
+    max_entry_bytes=settings.task_list_cache.max_entry_bytes,
+    max_window_bytes=settings.task_list_cache.max_window_bytes,
+)
@@ -0,0 +1,70 @@
+from time import monotonic
+
+from prometheus_client import Gauge
+from yarl import URL
+
+from config import settings
+
+CIRCUIT_OPEN = Gauge("circuit_breaker_open", "1, если автомат для сервиса разомкнут", ["upstream"])
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"Circuit for {upstream} is open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Автомат для одного сервиса.
+
+    После failure_threshold ошибок подряд размыкается и сразу отклоняет вызовы.
+    Через reset_timeout пропускает один пробный вызов (half-open): успех замыкает
+    автомат, ошибка снова размыкает его.
+    """
+
+    def __init__(self, upstream: str, failure_threshold: int, reset_timeout: float):
+        self.upstream = upstream
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+
+    def before_call(self):
+        if self.opened_at is None:
+            return
+        waited = monotonic() - self.opened_at
+        if waited < self.reset_timeout or self.probe_in_flight:
+            raise CircuitOpenError(self.upstream, retry_after=max(self.reset_timeout - waited, 1))
+        self.probe_in_flight = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        CIRCUIT_OPEN.labels(self.upstream).set(0)
+
+    def record_cancel(self):
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probe_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = monotonic()
+            self.probe_in_flight = False
+            CIRCUIT_OPEN.labels(self.upstream).set(1)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    upstream = str(URL(url).origin())
+    if upstream not in _breakers:
+        _breakers[upstream] = CircuitBreaker(
+            upstream,
+            failure_threshold=settings.aiohttp.breaker_failure_threshold,
+            reset_timeout=settings.aiohttp.breaker_reset_timeout,
+        )
+    return _breakers[upstream]
@@ -0,0 +1,283 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+
+import asyncpg
+import orjson
+from prometheus_client import Counter, Gauge
+
+from common.pg_metrics import observe_query
+from config import settings
+from fastapi_app.database.pg_accessor import db
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "task_events"
+EVENT_COLUMNS = "id, operation, task_id, user_id, status, task"
+CURRENT_SNAPSHOT = "SELECT pg_current_snapshot()::text"
+# События транзакций, зафиксированных после снимка $1, и снимок, в котором они прочитаны.
+# Снимок текущего оператора возвращается и без событий (строка с пустыми колонками событий).
+EVENTS_SINCE = f"""
+    WITH current AS (SELECT pg_current_snapshot() AS snapshot)
+    SELECT current.snapshot::text AS snapshot, e.*
+    FROM current
+    LEFT JOIN LATERAL (
+        SELECT {EVENT_COLUMNS}
+        FROM task_events
+        WHERE xid >= pg_snapshot_xmin($1::text::pg_snapshot) AND NOT pg_visible_in_snapshot(xid, $1::text::pg_snapshot)
+        ORDER BY id
+        LIMIT $2
+    ) AS e ON true
+"""
+DELETE_OLD_EVENTS = "DELETE FROM task_events WHERE created_at < now() - make_interval(hours => $1)"
+
+TASK_EVENT_SUBSCRIBERS = Gauge("task_event_subscribers", "Подключенные подписчики потока изменений задач")
+TASK_EVENTS = Counter("task_events_total", "События изменения задач, полученные слушателем")
+TASK_EVENT_SUBSCRIBERS_DROPPED = Counter(
+    "task_event_subscribers_dropped_total",
+    "Подписчики, отключенные из-за переполнения очереди",
+)
+
+
+def events_from_records(records: list[asyncpg.Record]) -> tuple[str, list[dict]]:
+    """Снимок и события из строк EVENTS_SINCE."""
+    events = []
+    for record in records:
+        if record["id"] is None:
+            continue
+        event = dict(record)
+        del event["snapshot"]
+        if event["task"] is not None:
+            event["task"] = orjson.loads(event["task"])
+        events.append(event)
+    return records[0]["snapshot"], events
+
+
+class Subscription:
+    """
+    Подписка на изменения задач с фильтром по пользователю и статусу.
+
+    backlog - события, зафиксированные после снимка из Last-Event-ID и прочитанные в снимке
+    backlog_snapshot, они отдаются первыми, а их повторы из очереди пропускаются. В очереди
+    лежат пары (событие, снимок), снимок указан у последнего события пачки. None в очереди
+    означает закрытие подписки.
+    """
+
+    def __init__(self, user_id: Optional[int], status: Optional[str], queue_size: int):
+        self.user_id = user_id
+        self.status = status
+        self.queue: asyncio.Queue[Optional[tuple[dict, Optional[str]]]] = asyncio.Queue(queue_size)
+        self.backlog: list[dict] = []
+        self.backlog_ids: set[int] = set()
+        self.backlog_snapshot: Optional[str] = None
+        self.truncated = False
+
+    def matches(self, event: dict) -> bool:
+        if self.user_id is not None and event["user_id"] != self.user_id:
+            return False
+        return self.status is None or event["status"] == self.status
+
+    def put(self, event: dict, snapshot: Optional[str]) -> bool:
+        """Ставит событие в очередь, False - очередь переполнена."""
+        try:
+            self.queue.put_nowait((event, snapshot))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def close(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class TaskEventListener:
+    """
+    Один на процесс слушатель уведомлений об изменениях задач.
+
+    Держит отдельное соединение с LISTEN task_events. id событий выдаются при записи и
+    не совпадают с порядком фиксации транзакций, поэтому по уведомлению читаются
+    события, не видимые в предыдущем снимке и видимые в текущем (по task_events.xid),
+    и раздаются подходящим подпискам. Каждое событие читается ровно один раз, снимок
+    после пачки служит id для Last-Event-ID. При потере соединения подписки
+    закрываются, клиенты переподключаются с Last-Event-ID.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        queue_size: int,
+        resume_limit: int,
+        retention_hours: int,
+        cleanup_interval: float,
+    ):
+        self.database_url = database_url
+        self.queue_size = queue_size
+        self.resume_limit = resume_limit
+        self.retention_hours = retention_hours
+        self.cleanup_interval = cleanup_interval
+        self._conn: Optional[asyncpg.Connection] = None
+        self._start_lock = asyncio.Lock()
+        self._notified = asyncio.Event()
+        self._snapshot: Optional[str] = None
+        self._tasks: list[asyncio.Task] = []
+        self._subscribers: set[Subscription] = set()
+
+    async def start(self):
+        async with self._start_lock:
+            if self._conn is not None and not self._conn.is_closed():
+                return
+            self._conn = await asyncpg.connect(self.database_url)
+            self._conn.add_termination_listener(self._on_terminated)
+            await self._conn.add_listener(CHANNEL, self._on_notify)
+            # Снимок берется после LISTEN: о транзакциях, зафиксированных позже, придет уведомление
+            self._snapshot = await self._conn.fetchval(CURRENT_SNAPSHOT)
+            self._tasks = [asyncio.create_task(self._dispatch()), asyncio.create_task(self._cleanup())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._close_subscribers()
+        if self._conn is not None and not self._conn.is_closed():
+            self._conn.remove_termination_listener(self._on_terminated)
+            await self._conn.close()
+        self._conn = None
+
+    def _on_notify(self, conn, pid, channel, payload: str):
+        self._notified.set()
+
+    def _on_terminated(self, conn):
+        logger.warning("Task events listener connection is lost")
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._conn = None
+        self._close_subscribers()
+
+    def _close_subscribers(self):
+        for subscription in self._subscribers:
+            subscription.close()
+        self._subscribers.clear()
+        TASK_EVENT_SUBSCRIBERS.set(0)
+
+    async def _dispatch(self):
+        while True:
+            await self._notified.wait()
+            # Уведомления, пришедшие во время чтения, приводят к следующему чтению
+            self._notified.clear()
+            try:
+                async with observe_query("task_events_since", self._conn, EVENTS_SINCE, (self._snapshot, None)):
+                    records = await self._conn.fetch(EVENTS_SINCE, self._snapshot, None)
+            except asyncpg.PostgresError:
+                logger.exception("Failed to read task events since %s", self._snapshot)
+                continue
+            self._snapshot, events = events_from_records(records)
+            self._publish(events, self._snapshot)
+
+    def _publish(self, events: list[dict], snapshot: str):
+        TASK_EVENTS.inc(len(events))
+        for subscription in list(self._subscribers):
+            matched = [event for event in events if subscription.matches(event)]
+            for n, event in enumerate(matched, 1):
+                if not subscription.put(event, snapshot if n == len(matched) else None):
+                    TASK_EVENT_SUBSCRIBERS_DROPPED.inc()
+                    self.unsubscribe(subscription)
+                    subscription.close()
+                    break
+
+    async def _cleanup(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                async for conn in db.get_conn():
+                    await conn.execute(DELETE_OLD_EVENTS, self.retention_hours)
+            except asyncpg.PostgresError:
+                logger.exception("Failed to delete old task events")
+
+    async def subscribe(self, user_id: Optional[int], status: Optional[str], last_event_id: Optional[str]):
+        """
+        Подписка на изменения задач, при last_event_id - с событиями, пропущенными после него.
+
+        Подписка регистрируется до чтения пропущенных событий, поэтому события, зафиксированные
+        между ними, попадают в backlog или в очередь. Неизвестный last_event_id (например,
+        числовой id прежних версий) приводит к reset.
+        """
+        await self.start()
+        subscription = Subscription(user_id, status, self.queue_size)
+        self._subscribers.add(subscription)
+        TASK_EVENT_SUBSCRIBERS.set(len(self._subscribers))
+        if last_event_id is None:
+            return subscription
+
+        async for conn in db.get_conn():
+            try:
+                async with observe_query("task_events_since", conn, EVENTS_SINCE, (last_event_id, self.resume_limit)):
+                    records = await conn.fetch(EVENTS_SINCE, last_event_id, self.resume_limit)
+            except asyncpg.DataError:
+                records = None
+                snapshot = await conn.fetchval(CURRENT_SNAPSHOT)
+        if records is None:
+            subscription.backlog_snapshot = snapshot
+            subscription.truncated = True
+            return subscription
+
+        subscription.backlog_snapshot, events = events_from_records(records)
+        subscription.truncated = len(events) == self.resume_limit
+        subscription.backlog = [event for event in events if subscription.matches(event)]
+        subscription.backlog_ids = {event["id"] for event in events}
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+        TASK_EVENT_SUBSCRIBERS.set(len(self._subscribers))
+
+
+def format_sse(event_type: str, data: dict, event_id: Optional[str] = None) -> bytes:
+    event_id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{event_id_line}event: {event_type}\ndata: ".encode() + orjson.dumps(data) + b"\n\n"
+
+
+async def sse_stream(subscription: Subscription, keepalive: float) -> AsyncIterator[bytes]:
+    """
+    События подписки в формате Server-Sent Events.
+
+    Если пропущенных событий больше resume_limit, вместо них отправляется событие reset:
+    клиенту нужно заново загрузить список задач. id SSE (снимок базы) указывается у
+    последнего события пачки, при обрыве посреди пачки она отдается повторно целиком.
+    Раз в keepalive секунд без событий отправляется комментарий, чтобы прокси не
+    закрывали соединение.
+    """
+    try:
+        if subscription.truncated:
+            yield format_sse("reset", {}, subscription.backlog_snapshot)
+        elif subscription.backlog:
+            *events, last = subscription.backlog
+            for event in events:
+                yield format_sse(event["operation"], event)
+            yield format_sse(last["operation"], last, subscription.backlog_snapshot)
+        while True:
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if item is None:
+                return
+            event, snapshot = item
+            if event["id"] not in subscription.backlog_ids:
+                yield format_sse(event["operation"], event, snapshot)
+            elif snapshot is not None:
+                # Событие уже отдано из backlog, но снимок пачки нужно передать клиенту
+                yield f"id: {snapshot}\n\n".encode()
+    finally:
+        task_event_listener.unsubscribe(subscription)
+
+
+task_event_listener = TaskEventListener(
+    database_url=db.database_url,
+    queue_size=settings.task_events.queue_size,
+    resume_limit=settings.task_events.resume_limit,
+    retention_hours=settings.task_events.retention_hours,
+    cleanup_interval=settings.task_events.cleanup_interval_seconds,
+)
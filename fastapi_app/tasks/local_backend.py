@@ -0,0 +1,82 @@
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, status
+
+from aiohttp_server import crud
+from aiohttp_server.codec import ndjson_chunks
+from aiohttp_server.database import TasksConnection
+from config import settings
+from fastapi_app.database.pg_accessor import db
+from fastapi_app.tasks.backend import TaskBackend
+
+
+class LocalTaskBackend(TaskBackend):
+    """
+    Задачи читаются и изменяются функциями aiohttp_server.crud в процессе FastAPI.
+
+    Используется общий пул PostgresAccessor, соединения которого подготавливают запросы crud.
+    Пул создается при запуске, после проверки версии схемы, и до него не должен быть создан
+    с обычными соединениями.
+    """
+
+    async def startup(self):
+        if db.pool:
+            raise RuntimeError("Postgres pool was created before the local task backend started")
+        await self._pool()
+
+    async def _pool(self):
+        if not db.pool:
+            await db.connect(connection_class=TasksConnection, init=TasksConnection.prepare_statements)
+        return db.pool
+
+    @staticmethod
+    def _limit(params: dict) -> int:
+        return min(params.get("limit", settings.tasks.default_page_size), settings.tasks.max_page_size)
+
+    async def list_tasks(self, params: dict) -> dict:
+        try:
+            return await crud.get_tasks(
+                await self._pool(),
+                limit=self._limit(params),
+                status=params.get("status"),
+                cursor=params.get("cursor"),
+            )
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    async def get_task(self, task_id: int) -> Optional[dict]:
+        return await crud.get_task(await self._pool(), task_id)
+
+    async def search_tasks(self, params: dict) -> dict:
+        try:
+            return await crud.search_tasks(
+                await self._pool(),
+                query=params["q"],
+                limit=self._limit(params),
+                status=params.get("status"),
+                cursor=params.get("cursor"),
+            )
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    async def stream_tasks(self, status: Optional[str]) -> AsyncIterator[bytes]:
+        tasks = crud.iter_tasks_json(await self._pool(), prefetch=settings.tasks.stream_prefetch, status=status)
+        return ndjson_chunks(tasks, settings.tasks.stream_chunk_size)
+
+    async def create_task(self, task: dict) -> dict:
+        return await crud.create_task(await self._pool(), task)
+
+    async def create_tasks(self, tasks: list[dict]) -> list[dict]:
+        return await crud.create_tasks(await self._pool(), tasks)
+
+    async def update_task(self, task: dict) -> Optional[dict]:
+        return await crud.update_task(await self._pool(), task)
+
+    async def update_tasks(self, tasks: list[dict]) -> list[Optional[dict]]:
+        return await crud.update_tasks(await self._pool(), tasks)
+
+    async def delete_task(self, task_id: int) -> Optional[dict]:
+        return await crud.delete_task(await self._pool(), task_id)
+
+    async def delete_tasks(self, task_ids: list[int]) -> list[Optional[dict]]:
+        return await crud.delete_tasks(await self._pool(), task_ids)
@@ -1,31 +1,93 @@
 import asyncio
+import random
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator
 
 import aiohttp
+import msgpack
+import orjson
+from aiohttp import compression_utils
 from fastapi import HTTPException, status
+from opentelemetry.trace import SpanKind
+from prometheus_client import Counter, Histogram
 
+from common.concurrency import AdaptiveLimiter, LimitExceeded
+from common.metrics import LATENCY_BUCKETS
+from common.tracing import inject_context, tracer
+from config import settings
 from fastapi_app.tasks.aiohttp_client import aiohttp_client
+from fastapi_app.tasks.circuit_breaker import CircuitOpenError, get_breaker
+from fastapi_app.tasks.single_flight import SingleFlight
 
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+BODY_CONTENT_TYPES = {"json": JSON_CONTENT_TYPE, "msgpack": MSGPACK_CONTENT_TYPE}
 
-async def make_request(method, url, **kwargs):
-    """
-    Обертка над клиентом aiohttp для отправки HTTP-запросов.
+STREAM_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=5)
 
-    Параметры:
-        method: str - метод HTTP-запроса
-        url: str - URL, на который отправляется запрос
-        **kwargs: дополнительные ключевые аргументы, которые передаются в клиент aiohttp
+DEADLINE_HEADER = "X-Request-Deadline"
+RETRYABLE_METHODS = {"GET", "DELETE"}
 
-    Возвращает:
-        response: dict - словарь с данными ответа
+UPSTREAM_RETRIES = Counter("upstream_retries_total", "Повторные запросы к сервису задач", ["method"])
+UPSTREAM_SECONDS = Histogram(
+    "upstream_request_seconds",
+    "Время запросов к сервису задач (для потоков - до получения заголовков) по статусу ответа",
+    ["method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+upstream_reads = SingleFlight()
+
+
+class UpstreamBodyError(Exception):
+    """Тело ответа сервиса задач обрезано или не декодируется."""
+
+
+def upstream_accept_encoding() -> str:
     """
+    Accept-Encoding запросов к сервису задач.
+
+    Запрашиваются только алгоритмы, которые клиент aiohttp умеет распаковывать
+    (br - с пакетом brotli, zstd - в новых версиях aiohttp), тела ответов он распаковывает сам.
+    """
+    if not settings.compression.upstream:
+        return "identity"
+    decodable = {"gzip"}
+    if compression_utils.HAS_BROTLI:
+        decodable.add("br")
+    if getattr(compression_utils, "HAS_ZSTD", False):
+        decodable.add("zstd")
+    return ", ".join(encoding for encoding in settings.compression.encodings if encoding in decodable) or "identity"
+
+
+UPSTREAM_ACCEPT_ENCODING = upstream_accept_encoding()
+
+
+@contextmanager
+def upstream_errors():
+    """Преобразует ошибки клиента aiohttp в HTTPException."""
     try:
-        client = await aiohttp_client.get_client()
-        async with client.request(method, url, **kwargs) as response:
-            response.raise_for_status()
-            return await response.json()
+        yield
+
+    except (CircuitOpenError, LimitExceeded) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service unavailable",
+            headers={"Retry-After": str(int(e.retry_after))},
+        )
+
+    except UpstreamBodyError:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Invalid upstream response")
 
     except aiohttp.ClientResponseError as e:
-        raise HTTPException(status_code=e.status, detail=e.message)
+        # Retry-After при перегрузке сервиса (503) передается клиенту
+        retry_after = e.headers.get("Retry-After") if e.headers else None
+        raise HTTPException(
+            status_code=e.status,
+            detail=e.message,
+            headers={"Retry-After": retry_after} if retry_after else None,
+        )
 
     except aiohttp.ClientError:
         raise HTTPException(
@@ -35,3 +97,190 @@ async def make_request(method, url, **kwargs):
 
     except asyncio.TimeoutError:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Timeout error")
+
+
+@contextmanager
+def observe_upstream(method: str, url: str):
+    """
+    Замеряет время запроса к сервису и записывает его клиентский спан.
+
+    Статус ответа записывается в outcome["status"], иначе в метрике будет error.
+    """
+    outcome = {"status": "error"}
+    started = time.perf_counter()
+    attributes = {"http.request.method": method, "url.full": url}
+    try:
+        with tracer.start_as_current_span(f"HTTP {method}", kind=SpanKind.CLIENT, attributes=attributes) as span:
+            yield outcome
+            span.set_attribute("http.response.status_code", outcome["status"])
+    finally:
+        UPSTREAM_SECONDS.labels(method, str(outcome["status"])).observe(time.perf_counter() - started)
+
+
+def freeze(mapping: dict | None) -> tuple:
+    return tuple(sorted((mapping or {}).items()))
+
+
+async def read_response(response: aiohttp.ClientResponse):
+    """Декодирует тело ответа в формате, указанном в Content-Type, некорректное тело - UpstreamBodyError."""
+    try:
+        if response.content_type == MSGPACK_CONTENT_TYPE:
+            return msgpack.unpackb(await response.read())
+        return await response.json(loads=orjson.loads)
+    except (ValueError, aiohttp.ContentTypeError) as e:
+        raise UpstreamBodyError(str(e)) from e
+
+
+async def make_request(method, url, json=None, headers=None, **kwargs):
+    """
+    Обертка над клиентом aiohttp для отправки HTTP-запросов.
+
+    Тело запроса кодируется и ответ запрашивается в формате settings.aiohttp.body_format.
+    Одновременные одинаковые GET-запросы объединяются в один, их общий результат нельзя изменять.
+
+    Параметры:
+        method: str - метод HTTP-запроса
+        url: str - URL, на который отправляется запрос
+        json: данные тела запроса (по умолчанию None)
+        headers: dict - дополнительные заголовки запроса (по умолчанию None)
+        **kwargs: дополнительные ключевые аргументы, которые передаются в клиент aiohttp
+
+    Возвращает:
+        response: dict - словарь с данными ответа
+    """
+    content_type = BODY_CONTENT_TYPES[settings.aiohttp.body_format]
+    headers = {"Accept": content_type, "Accept-Encoding": UPSTREAM_ACCEPT_ENCODING, **(headers or {})}
+    if json is not None:
+        if content_type == MSGPACK_CONTENT_TYPE:
+            kwargs["data"] = msgpack.packb(json)
+            headers["Content-Type"] = MSGPACK_CONTENT_TYPE
+        else:
+            kwargs["json"] = json
+
+    if method == "GET" and kwargs.keys() <= {"params"}:
+        key = (url, freeze(kwargs.get("params")), freeze(headers))
+        return await upstream_reads.do(key, lambda: send_request(method, url, headers, **kwargs))
+    return await send_request(method, url, headers, **kwargs)
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Ошибка, которая говорит о неисправности сервиса, а не о некорректном запросе."""
+    if isinstance(error, UpstreamBodyError):
+        return True
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+upstream_limiter = AdaptiveLimiter(
+    "upstream",
+    is_overload=is_upstream_failure,
+    **settings.concurrency_limit.limiter_kwargs(),
+)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Экспоненциальная задержка перед повтором со случайным разбросом (full jitter)."""
+    cap = min(settings.aiohttp.retry_backoff_max, settings.aiohttp.retry_backoff_base * 2**attempt)
+    return random.uniform(0, cap)
+
+
+async def send_request(method, url, headers, **kwargs):
+    """
+    Отправляет запрос через автомат сервиса с общим для всех попыток крайним сроком.
+
+    Срок передается сервису в заголовке X-Request-Deadline (unix-время в мс).
+    GET и DELETE при сбоях сервиса повторяются не более retry_attempts раз, пока не истек срок.
+    Число одновременных запросов к сервису ограничивает upstream_limiter, при перегрузке возвращается 503.
+    """
+    breaker = get_breaker(url)
+    deadline = time.time() + settings.aiohttp.request_timeout
+    headers = {**headers, DEADLINE_HEADER: str(int(deadline * 1000))}
+    attempts = 1 + (settings.aiohttp.retry_attempts if method in RETRYABLE_METHODS else 0)
+
+    with upstream_errors():
+        async with upstream_limiter.acquire():
+            return await send_with_retries(method, url, headers, breaker, deadline, attempts, **kwargs)
+
+
+async def send_with_retries(method, url, headers, breaker, deadline, attempts, **kwargs):
+    """Выполняет запрос и повторяет его при сбоях сервиса, пока есть попытки и не истек срок."""
+    client = await aiohttp_client.get_client()
+    for attempt in range(attempts):
+        breaker.before_call()
+        timeout = aiohttp.ClientTimeout(total=max(deadline - time.time(), 0.001))
+        try:
+            with observe_upstream(method, url) as outcome:
+                request_headers = inject_context(dict(headers))
+                async with client.request(method, url, headers=request_headers, timeout=timeout, **kwargs) as response:
+                    outcome["status"] = response.status
+                    response.raise_for_status()
+                    result = await read_response(response)
+        except asyncio.CancelledError:
+            breaker.record_cancel()
+            raise
+        except Exception as e:
+            if not is_upstream_failure(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            delay = backoff_delay(attempt)
+            if attempt + 1 == attempts or time.time() + delay >= deadline:
+                raise
+            UPSTREAM_RETRIES.labels(method).inc()
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+
+async def stream_request(method, url, **kwargs) -> AsyncIterator[bytes]:
+    """
+    Отправляет HTTP-запрос и возвращает итератор по телу ответа без его буферизации.
+
+    Статус ответа проверяется до возврата итератора, поэтому ошибки сервиса
+    превращаются в HTTPException до начала отправки ответа клиенту. Ограничитель
+    upstream_limiter учитывает только открытие потока, а не чтение тела.
+
+    Параметры:
+        method: str - метод HTTP-запроса
+        url: str - URL, на который отправляется запрос
+        **kwargs: дополнительные ключевые аргументы, которые передаются в клиент aiohttp
+
+    Возвращает:
+        chunks: AsyncIterator[bytes] - части тела ответа в порядке получения
+    """
+    breaker = get_breaker(url)
+    with upstream_errors():
+        breaker.before_call()
+        client = await aiohttp_client.get_client()
+        try:
+            async with upstream_limiter.acquire():
+                with observe_upstream(method, url) as outcome:
+                    headers = {"Accept-Encoding": UPSTREAM_ACCEPT_ENCODING, **(kwargs.pop("headers", None) or {})}
+                    inject_context(headers)
+                    response = await client.request(method, url, headers=headers, timeout=STREAM_TIMEOUT, **kwargs)
+                    outcome["status"] = response.status
+                    response.raise_for_status()
+        except asyncio.CancelledError:
+            breaker.record_cancel()
+            raise
+        except LimitExceeded:
+            breaker.record_cancel()
+            raise
+        except Exception as e:
+            if is_upstream_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        breaker.record_success()
+
+    async def iter_chunks():
+        try:
+            async for chunk in response.content.iter_any():
+                yield chunk
+        finally:
+            response.release()
+
+    return iter_chunks()
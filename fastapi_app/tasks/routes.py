@@ -1,59 +1,230 @@
-from typing import Optional
-from urllib.parse import urlencode, urljoin
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
 
+from common.etag import etag_matches, make_etag
+from common.task_statuses import DEFAULT_TASK_STATUS, TaskStatus
 from config import settings
-from fastapi_app.auth.schema import UserDBSchema
+from fastapi_app.auth.schema import AuthUserSchema
 from fastapi_app.auth.validation import get_current_auth_user
-from fastapi_app.tasks.make_request import make_request
+from fastapi_app.rate_limit.dependencies import limit_by_user
+from fastapi_app.tasks.backend import NDJSON_CONTENT_TYPE, TaskBackend, get_task_backend
+from fastapi_app.tasks.cache import task_list_cache
+from fastapi_app.tasks.events import sse_stream, task_event_listener
 from fastapi_app.tasks.schema import (
+    MAX_TASK_ID,
+    BatchTasksResponseSchema,
     ListTasksResponseSchema,
     TaskFullSchema,
     TaskResponseSchema,
+    TasksBatchCreateSchema,
+    TasksBatchDeleteSchema,
+    TasksBatchUpdateSchema,
     TaskSchema,
     TaskUpdateSchema,
 )
 
+TaskIdPath = Annotated[int, Path(ge=1, le=MAX_TASK_ID)]
+
 http_bearer = HTTPBearer(auto_error=False)
-tasks_router = APIRouter(tags=["tasks"], dependencies=[Depends(http_bearer)])
+tasks_router = APIRouter(tags=["tasks"], dependencies=[Depends(http_bearer), Depends(limit_by_user("tasks"))])
+
 
-base_url = f"http://{settings.aiohttp.host}:{settings.aiohttp.port}/tasks"
+async def check_etag(request: Request, response: Response) -> Optional[str]:
+    """
+    ETag представления по версии коллекции задач из кэша списков.
+
+    Если ETag совпадает с If-None-Match, отвечает 304 до обращения к сервису задач.
+    Без версии (кэш выключен или Redis недоступен) ETag не выставляется.
+    """
+    version = await task_list_cache.version()
+    if version is None:
+        return None
+    etag = make_etag(version, request.url.path, sorted(request.query_params.multi_items()))
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return version
 
 
 @tasks_router.get(
     "/",
-    summary="Получение списка всех задач с возможностью фильтрации по статусу.",
+    summary="Получение списка задач постранично с возможностью фильтрации по статусу.",
     response_model=ListTasksResponseSchema,
     status_code=status.HTTP_200_OK,
 )
 async def get_task_endpoint(
-    task_status: Optional[str] = None,
-    user: UserDBSchema = Depends(get_current_auth_user),
+    task_status: Optional[TaskStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.tasks.default_page_size, ge=1, le=settings.tasks.max_page_size),
+    user: AuthUserSchema = Depends(get_current_auth_user),
+    backend: TaskBackend = Depends(get_task_backend),
+    version: Optional[str] = Depends(check_etag),
 ):
     """
-    Получение списка задач
+    Получение страницы списка задач, упорядоченного по id
 
     Параметры:
         status: str - Сортировка по статусу задачи (по умолчанию None)
+        cursor: str - Курсор следующей страницы из предыдущего ответа (по умолчанию None)
+        limit: int - Количество задач на странице
 
     Возвращает:
         message: str - Сообщение об успешном получении списка задач
         tasks: List[TaskFullSchema] - Список задач
+        next_cursor: str - Курсор следующей страницы или None, если страница последняя
     """
+    params = {"limit": limit}
     if task_status:
-        params = urlencode({"status": task_status})
-        url = urljoin(base_url, "?" + params)
-    else:
-        url = base_url
-    tasks = await make_request("GET", url)
+        params["status"] = task_status
+    if cursor:
+        params["cursor"] = cursor
+    tasks = await task_list_cache.get_or_fetch(params, lambda: backend.list_tasks(params), version)
     return {
         "message": "Список задач",
         "tasks": [TaskFullSchema(**task) for task in tasks["tasks"]],
+        "next_cursor": tasks["next_cursor"],
     }
 
 
+@tasks_router.get(
+    "/search/",
+    summary="Полнотекстовый поиск задач по названию и описанию постранично.",
+    response_model=ListTasksResponseSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def search_tasks_endpoint(
+    q: str = Query(min_length=1, max_length=settings.tasks.max_search_query_length),
+    task_status: Optional[TaskStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.tasks.default_page_size, ge=1, le=settings.tasks.max_page_size),
+    user: AuthUserSchema = Depends(get_current_auth_user),
+    backend: TaskBackend = Depends(get_task_backend),
+    version: Optional[str] = Depends(check_etag),
+):
+    """
+    Поиск задач по словам в названии и описании, а также по началу слов и с опечатками в названии
+
+    Параметры:
+        q: str - Поисковый запрос (поддерживаются "фразы в кавычках", or и -исключение слов)
+        status: str - Сортировка по статусу задачи (по умолчанию None)
+        cursor: str - Курсор следующей страницы из предыдущего ответа (по умолчанию None)
+        limit: int - Количество задач на странице
+
+    Возвращает:
+        message: str - Сообщение об успешном поиске задач
+        tasks: List[TaskFullSchema] - Найденные задачи в порядке убывания релевантности
+        next_cursor: str - Курсор следующей страницы или None, если страница последняя
+    """
+    params = {"q": q, "limit": limit}
+    if task_status:
+        params["status"] = task_status
+    if cursor:
+        params["cursor"] = cursor
+    tasks = await task_list_cache.get_or_fetch(params, lambda: backend.search_tasks(params), version)
+    return {
+        "message": "Результаты поиска задач",
+        "tasks": [TaskFullSchema(**task) for task in tasks["tasks"]],
+        "next_cursor": tasks["next_cursor"],
+    }
+
+
+@tasks_router.get(
+    "/stream/",
+    summary="Потоковая выгрузка всех задач в формате NDJSON с возможностью фильтрации по статусу.",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def stream_tasks_endpoint(
+    task_status: Optional[TaskStatus] = None,
+    user: AuthUserSchema = Depends(get_current_auth_user),
+    backend: TaskBackend = Depends(get_task_backend),
+):
+    """
+    Потоковая выгрузка задач, по одной задаче в строке
+
+    Тело ответа сервиса задач передается клиенту по частям без разбора и повторной валидации.
+
+    Параметры:
+        status: str - Сортировка по статусу задачи (по умолчанию None)
+
+    Возвращает:
+        application/x-ndjson - задачи в формате TaskFullSchema, по одной в строке
+    """
+    chunks = await backend.stream_tasks(task_status)
+    return StreamingResponse(chunks, media_type=NDJSON_CONTENT_TYPE)
+
+
+@tasks_router.get(
+    "/events/",
+    summary="Поток изменений задач (Server-Sent Events) с фильтрацией по пользователю и статусу.",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def task_events_endpoint(
+    user_id: Optional[int] = None,
+    task_status: Optional[TaskStatus] = None,
+    last_event_id: Optional[str] = Header(None),
+    user: AuthUserSchema = Depends(get_current_auth_user),
+):
+    """
+    Подписка на создание, изменение и удаление задач
+
+    Параметры:
+        user_id: int - Только задачи пользователя (по умолчанию None)
+        status: str - Только задачи со статусом (по умолчанию None)
+        Last-Event-ID: str - Заголовок с id SSE последнего полученного события для продолжения потока
+
+    Возвращает:
+        text/event-stream - события insert, update и delete (id задачи и события в data),
+        reset - пропущено слишком много событий и список задач нужно загрузить заново
+    """
+    subscription = await task_event_listener.subscribe(user_id, task_status, last_event_id)
+    return StreamingResponse(
+        sse_stream(subscription, settings.task_events.keepalive_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@tasks_router.get(
+    "/{task_id}/",
+    summary="Получение задачи по id",
+    response_model=TaskResponseSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def get_task_by_id_endpoint(
+    task_id: TaskIdPath,
+    user: AuthUserSchema = Depends(get_current_auth_user),
+    backend: TaskBackend = Depends(get_task_backend),
+    version: Optional[str] = Depends(check_etag),
+):
+    """
+    Получение задачи по id
+
+    Параметры:
+        id: int - id задачи
+
+    Возвращает:
+        message: str - сообщение об успешном получении задачи
+        task: TaskFullSchema - задача
+
+    Ошибки:
+        304 - задача не изменилась с версии из If-None-Match
+        404 - задача не найдена
+    """
+    task = await backend.get_task(task_id)
+    if task:
+        return {"message": "Задача", "task": TaskFullSchema(**task)}
+
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Задача с id {task_id} не найдена",
+    )
+
+
 @tasks_router.post(
     "/",
     summary="Создание задачи",
@@ -62,7 +233,8 @@ async def get_task_endpoint(
 )
 async def create_task(
     task: TaskSchema,
-    user: UserDBSchema = Depends(get_current_auth_user),
+    user: AuthUserSchema = Depends(get_current_auth_user),
+    backend: TaskBackend = Depends(get_task_backend),
 ):
     """
     Создание задачи
@@ -76,14 +248,100 @@ async def create_task(
         message: str - сообщение об успешном создании, с информацией о созданной задаче
     """
     if not task.status:
-        task.status = "Добавлена"
+        task.status = DEFAULT_TASK_STATUS
     task_dict = task.model_dump()
     task_dict["user_id"] = user.id
-    created_task = await make_request("POST", base_url, json=task_dict)
+    created_task = await backend.create_task(task_dict)
+    await task_list_cache.invalidate()
 
     return {"message": "Задача создана", "task": TaskFullSchema(**created_task)}
 
 
+@tasks_router.post(
+    "/batch/",
+    summary="Пакетное создание задач",
+    response_model=BatchTasksResponseSchema,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_tasks_endpoint(
+    batch: TasksBatchCreateSchema,
+    user: AuthUserSchema = Depends(get_current_auth_user),
+    backend: TaskBackend = Depends(get_task_backend),
+):
+    """
+    Создание нескольких задач в одной транзакции
+
+    Параметры:
+        tasks: List[TaskSchema] - задачи для создания
+
+    Возвращает:
+        message: str - сообщение об успешном создании
+        tasks: List[TaskFullSchema] - созданные задачи в порядке входных данных
+    """
+    tasks = []
+    for task in batch.tasks:
+        task_dict = task.model_dump()
+        task_dict["status"] = task_dict["status"] or DEFAULT_TASK_STATUS
+        task_dict["user_id"] = user.id
+        tasks.append(task_dict)
+    created_tasks = await backend.create_tasks(tasks)
+    await task_list_cache.invalidate()
+    return {"message": "Задачи созданы", "tasks": created_tasks}
+
+
+@tasks_router.put(
+    "/batch/",
+    summary="Пакетное обновление задач",
+    response_model=BatchTasksResponseSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def update_tasks_endpoint(
+    batch: TasksBatchUpdateSchema,
+    user: AuthUserSchema = Depends(get_current_auth_user),
+    backend: TaskBackend = Depends(get_task_backend),
+):
+    """
+    Обновление нескольких задач в одной транзакции
+
+    Параметры:
+        tasks: List[TaskBatchUpdateSchema] - id задач и новые значения полей, не переданные поля не меняются
+
+    Возвращает:
+        message: str - сообщение об успешном обновлении
+        tasks: List[TaskFullSchema | None] - обновленные задачи в порядке входных данных, None для не найденных
+    """
+    tasks = [task.model_dump() for task in batch.tasks]
+    updated_tasks = await backend.update_tasks(tasks)
+    await task_list_cache.invalidate()
+    return {"message": "Задачи обновлены", "tasks": updated_tasks}
+
+
+@tasks_router.delete(
+    "/batch/",
+    summary="Пакетное удаление задач",
+    response_model=BatchTasksResponseSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def delete_tasks_endpoint(
+    batch: TasksBatchDeleteSchema,
+    user: AuthUserSchema = Depends(get_current_auth_user),
+    backend: TaskBackend = Depends(get_task_backend),
+):
+    """
+    Удаление нескольких задач по id в одной транзакции
+
+    Параметры:
+        ids: List[int] - id задач
+
+    Возвращает:
+        message: str - сообщение об успешном удалении
+        tasks: List[TaskFullSchema | None] - удаленные задачи в порядке входных данных, None для не найденных
+    """
+    deleted_tasks = await backend.delete_tasks(batch.ids)
+    await task_list_cache.invalidate()
+    return {"message": "Задачи удалены", "tasks": deleted_tasks}
+
+
 @tasks_router.put(
     "/{task_id}/",
     summary="Oбновление задачи",
@@ -91,9 +349,10 @@ async def create_task(
     status_code=status.HTTP_201_CREATED,
 )
 async def update_task_endpoint(
-    task_id: int,
+    task_id: TaskIdPath,
     task_update: TaskUpdateSchema,
-    user: UserDBSchema = Depends(get_current_auth_user),
+    user: AuthUserSchema = Depends(get_current_auth_user),
+    backend: TaskBackend = Depends(get_task_backend),
 ):
     """
     Обновление задачи
@@ -112,7 +371,8 @@ async def update_task_endpoint(
     """
     task_update_dict = task_update.model_dump()
     task_update_dict["id"] = task_id
-    task = await make_request("PUT", base_url, json=task_update_dict)
+    task = await backend.update_task(task_update_dict)
+    await task_list_cache.invalidate()
     if task:
         return {"message": "Задача обновлена", "task": TaskFullSchema(**task)}
 
@@ -129,8 +389,9 @@ async def update_task_endpoint(
     status_code=status.HTTP_200_OK,
 )
 async def delete_task_endpoint(
-    task_id: int,
-    user: UserDBSchema = Depends(get_current_auth_user),
+    task_id: TaskIdPath,
+    user: AuthUserSchema = Depends(get_current_auth_user),
+    backend: TaskBackend = Depends(get_task_backend),
 ):
     """
     Удаление задачи по id
@@ -144,8 +405,8 @@ async def delete_task_endpoint(
     Ошибки:
         404 - задача не найдена
     """
-    url = f"{base_url}/{task_id}"
-    deleted_task = await make_request("DELETE", url)
+    deleted_task = await backend.delete_task(task_id)
+    await task_list_cache.invalidate()
     if deleted_task:
         return {"message": "Задача удалена", "task": deleted_task}
 
@@ -1,15 +1,27 @@
-from typing import Optional
+from typing import Annotated, Optional
 
 from pydantic import BaseModel, Field
 
+from aiohttp_server.crud import MAX_TASK_ID
+from common.task_statuses import TaskStatus
+from config import settings
+
+# Границы колонок tasks (title VARCHAR(255), id SERIAL): значения за ними отклоняются с 422
+# до обращения к бэкенду, одинаково для локального и удаленного сервиса задач
+TITLE_MAX_LENGTH = 255
+
+TaskId = Annotated[int, Field(ge=1, le=MAX_TASK_ID)]
+
 
 class TaskSchema(BaseModel):
-    title: str
+    title: str = Field(max_length=TITLE_MAX_LENGTH)
     description: str
-    status: Optional[str] = None
+    status: Optional[TaskStatus] = None
 
 
 class TaskFullSchema(TaskSchema):
+    # В ответах возможны статусы, записанные до перехода на фиксированный набор
+    status: Optional[str] = None
     id: int
     user_id: Optional[int]
 
@@ -22,6 +34,7 @@ class TaskResponseSchema(BaseModel):
 class ListTasksResponseSchema(BaseModel):
     message: str
     tasks: Optional[list[TaskFullSchema]] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
 
 
 class TaskIdResponseSchema(BaseModel):
@@ -30,6 +43,27 @@ class TaskIdResponseSchema(BaseModel):
 
 
 class TaskUpdateSchema(BaseModel):
-    title: Optional[str] = None
+    title: Optional[str] = Field(default=None, max_length=TITLE_MAX_LENGTH)
     description: Optional[str] = None
-    status: Optional[str] = None
+    status: Optional[TaskStatus] = None
+
+
+class TaskBatchUpdateSchema(TaskUpdateSchema):
+    id: TaskId
+
+
+class TasksBatchCreateSchema(BaseModel):
+    tasks: list[TaskSchema] = Field(min_length=1, max_length=settings.tasks.max_batch_size)
+
+
+class TasksBatchUpdateSchema(BaseModel):
+    tasks: list[TaskBatchUpdateSchema] = Field(min_length=1, max_length=settings.tasks.max_batch_size)
+
+
+class TasksBatchDeleteSchema(BaseModel):
+    ids: list[TaskId] = Field(min_length=1, max_length=settings.tasks.max_batch_size)
+
+
+class BatchTasksResponseSchema(BaseModel):
+    message: str
+    tasks: list[Optional[TaskFullSchema]]
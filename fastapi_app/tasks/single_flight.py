@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from prometheus_client import Counter
+
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls_total",
+    "Вызовы через single-flight: leader - выполненные, coalesced - присоединенные к уже выполняющимся",
+    ["role"],
+)
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные вызовы с одинаковым ключом в один.
+
+    Первый вызов запускает задачу, остальные ждут ее результат или исключение.
+    Отмена одного ожидающего не отменяет задачу для остальных. Результат общий
+    для всех ожидающих и не должен изменяться вызывающим кодом.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        if task := self._in_flight.get(key):
+            SINGLE_FLIGHT_CALLS.labels("coalesced").inc()
+        else:
+            SINGLE_FLIGHT_CALLS.labels("leader").inc()
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
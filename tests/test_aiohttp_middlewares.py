@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from aiohttp_server import middlewares
+from aiohttp_server.codec import NDJSON_CONTENT_TYPE
+from aiohttp_server.middlewares import DEADLINE_HEADER, concurrency_middleware, deadline_middleware
+from common.concurrency import AdaptiveLimiter
+
+
+def deadline_in(seconds: float) -> dict:
+    return {DEADLINE_HEADER: str(int((time.time() + seconds) * 1000))}
+
+
+def fixed_limiter(name: str, limit: int, max_queue: int) -> AdaptiveLimiter:
+    return AdaptiveLimiter(
+        name,
+        initial_limit=limit,
+        min_limit=limit,
+        max_limit=limit,
+        max_queue=max_queue,
+        queue_timeout=5,
+        latency_target=10,
+        backoff_ratio=0.9,
+    )
+
+
+async def test_deadline_is_rechecked_after_queue_wait(monkeypatch):
+    monkeypatch.setattr(middlewares, "handler_limiter", fixed_limiter("test", limit=1, max_queue=10))
+    calls = []
+
+    async def slow(request):
+        calls.append(request.query["n"])
+        await asyncio.sleep(0.3)
+        return web.Response(text="ok")
+
+    app = web.Application(middlewares=[deadline_middleware, concurrency_middleware])
+    app.router.add_get("/", slow)
+    async with TestClient(TestServer(app)) as client:
+        first = asyncio.create_task(client.get("/", params={"n": "1"}, headers=deadline_in(5)))
+        await asyncio.sleep(0.05)
+        # Срок второго запроса истекает, пока первый занимает единственное место
+        second = await client.get("/", params={"n": "2"}, headers=deadline_in(0.1))
+        assert second.status == 504
+        assert (await first).status == 200
+
+    assert calls == ["1"]
+
+
+async def test_streams_have_a_separate_limit(monkeypatch):
+    monkeypatch.setattr(middlewares, "handler_limiter", fixed_limiter("test", limit=10, max_queue=0))
+    monkeypatch.setattr(middlewares, "stream_limiter", fixed_limiter("test_streams", limit=1, max_queue=0))
+    release = asyncio.Event()
+
+    async def stream(request):
+        if NDJSON_CONTENT_TYPE in request.headers.get("Accept", ""):
+            await release.wait()
+        return web.Response(text="ok")
+
+    app = web.Application(middlewares=[concurrency_middleware])
+    app.router.add_get("/", stream)
+    ndjson = {"Accept": NDJSON_CONTENT_TYPE}
+    async with TestClient(TestServer(app)) as client:
+        first = asyncio.create_task(client.get("/", headers=ndjson))
+        await asyncio.sleep(0.05)
+        second = await client.get("/", headers=ndjson)
+        assert second.status == 503
+        assert "Retry-After" in second.headers
+        assert (await client.get("/")).status == 200
+        release.set()
+        assert (await first).status == 200
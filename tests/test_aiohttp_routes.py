@@ -0,0 +1,116 @@
+import orjson
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from aiohttp_server.codec import NDJSON_CONTENT_TYPE
+from aiohttp_server.crud import MAX_TASK_ID
+from aiohttp_server.routes import routes
+from benchmarks.stand_ins import MemoryPool
+
+TASK = {"title": "Задача", "description": "Описание", "status": "Добавлена", "user_id": 1}
+
+
+@pytest.fixture
+async def client():
+    app = web.Application()
+    app.router.add_routes(routes)
+    app["pool"] = MemoryPool()
+    async with TestClient(TestServer(app)) as client:
+        yield client
+
+
+async def test_create_and_update_task(client):
+    response = await client.post("/tasks", json=TASK)
+    assert response.status == 200
+    task = await response.json()
+
+    response = await client.put("/tasks", json={"id": task["id"], "status": "В работе"})
+    assert response.status == 200
+    assert await response.json() == dict(task, status="В работе")
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        ["x"],
+        [1, "2"],
+        [True],
+        [0],
+        [MAX_TASK_ID + 1],
+        [1.5],
+        [],
+        {"ids": [1]},
+    ],
+)
+async def test_delete_batch_rejects_invalid_ids(client, body):
+    response = await client.delete("/tasks/batch", json=body)
+    assert response.status == 400
+
+
+@pytest.mark.parametrize(
+    "item",
+    [
+        "x",
+        {key: value for key, value in TASK.items() if key != "title"},
+        {key: value for key, value in TASK.items() if key != "user_id"},
+        dict(TASK, title=None),
+        dict(TASK, title=1),
+        dict(TASK, title="x" * 256),
+        dict(TASK, user_id="1"),
+        dict(TASK, status="Произвольный"),
+        dict(TASK, status=None),
+    ],
+)
+async def test_create_rejects_invalid_tasks(client, item):
+    response = await client.post("/tasks", json=item)
+    assert response.status == 400
+    response = await client.post("/tasks/batch", json=[TASK, item])
+    assert response.status == 400
+    assert client.app["pool"].store.tasks == {}
+
+
+@pytest.mark.parametrize(
+    "item",
+    [{"title": "x"}, {"id": "1"}, {"id": 1, "description": 1}, {"id": 1, "status": "Произвольный"}, [1]],
+)
+async def test_update_rejects_invalid_tasks(client, item):
+    response = await client.put("/tasks", json=item)
+    assert response.status == 400
+    response = await client.put("/tasks/batch", json=[item])
+    assert response.status == 400
+
+
+async def test_malformed_body_is_bad_request(client):
+    response = await client.post("/tasks", data=b"{", headers={"Content-Type": "application/json"})
+    assert response.status == 400
+
+
+@pytest.mark.parametrize("path", ["/tasks", "/tasks/search"])
+async def test_status_filter_is_checked(client, path):
+    response = await client.get(path, params={"q": "задача", "status": "Произвольный"})
+    assert response.status == 400
+
+
+async def test_list_tasks_by_status(client):
+    await client.post("/tasks/batch", json=[TASK, dict(TASK, status="Выполнена")])
+    response = await client.get("/tasks", params={"status": "Выполнена"})
+    assert response.status == 200
+    assert [task["status"] for task in (await response.json())["tasks"]] == ["Выполнена"]
+
+
+@pytest.mark.parametrize("status, expected", [(None, ["Добавлена", "Выполнена"]), ("Выполнена", ["Выполнена"])])
+async def test_stream_tasks(client, status, expected):
+    await client.post("/tasks/batch", json=[TASK, dict(TASK, status="Выполнена")])
+    params = {"status": status} if status else {}
+    response = await client.get("/tasks", params=params, headers={"Accept": NDJSON_CONTENT_TYPE})
+    assert response.status == 200
+    assert response.content_type == NDJSON_CONTENT_TYPE
+    lines = (await response.read()).splitlines()
+    assert [orjson.loads(line)["status"] for line in lines] == expected
+
+
+async def test_stream_rejects_invalid_status_before_streaming(client):
+    response = await client.get("/tasks", params={"status": "Произвольный"}, headers={"Accept": NDJSON_CONTENT_TYPE})
+    assert response.status == 400
+    assert response.reason == "Invalid status"
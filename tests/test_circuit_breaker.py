@@ -0,0 +1,103 @@
+import pytest
+
+from fastapi_app.tasks import circuit_breaker
+from fastapi_app.tasks.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Управляемое время monotonic() автомата."""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker, "monotonic", lambda: now[0])
+    return now
+
+
+def open_breaker(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=3, reset_timeout=10)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 10
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=2, reset_timeout=10)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    breaker.before_call()
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=1, reset_timeout=10)
+    open_breaker(breaker)
+
+    clock[0] += 4
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 6
+
+    clock[0] += 6
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_successful_probe_closes(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+
+    clock[0] += 10
+    breaker.before_call()
+    breaker.record_success()
+
+    breaker.before_call()
+    breaker.before_call()
+    assert breaker.opened_at is None
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=5, reset_timeout=10)
+    open_breaker(breaker)
+
+    clock[0] += 10
+    breaker.before_call()
+    breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 10
+
+
+def test_cancelled_probe_allows_another(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=1, reset_timeout=10)
+    open_breaker(breaker)
+
+    clock[0] += 10
+    breaker.before_call()
+    breaker.record_cancel()
+
+    breaker.before_call()
+
+
+def test_breakers_are_shared_per_origin(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+
+    breaker = circuit_breaker.get_breaker("http://aiohttp:8080/tasks")
+
+    assert circuit_breaker.get_breaker("http://aiohttp:8080/tasks/batch") is breaker
+    assert circuit_breaker.get_breaker("http://other:8080/tasks") is not breaker
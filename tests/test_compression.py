@@ -0,0 +1,208 @@
+import gzip
+import zlib
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient as AiohttpTestClient
+from aiohttp.test_utils import TestServer
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from aiohttp_server.codec import NDJSON_CONTENT_TYPE, CompressedStreamResponse
+from aiohttp_server.middlewares import compression_middleware
+from common import compression
+from common.compression import GzipEncoder, choose_encoding, create_encoder, parse_accept_encoding, weaken_etag
+from config import settings
+from fastapi_app.compression import CompressionMiddleware
+
+MIN_SIZE = settings.compression.min_size
+BIG_BODY = b'{"tasks": [' + b'{"title": "task"},' * MIN_SIZE + b"{}]}"
+LINES = [b'{"id": %d}\n' % n for n in range(3)]
+
+
+@pytest.fixture
+def all_encoders(monkeypatch):
+    """Все алгоритмы доступны, даже если brotli и zstandard не установлены."""
+    monkeypatch.setitem(compression.ENCODERS, "br", GzipEncoder)
+    monkeypatch.setitem(compression.ENCODERS, "zstd", GzipEncoder)
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, BR;q=0.5, zstd;q=x, ;q=1") == {"gzip": 1.0, "br": 0.5, "zstd": 0.0}
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, br, zstd", "zstd"),
+        ("gzip;q=1, br;q=0.5, zstd;q=0.1", "gzip"),
+        ("zstd;q=0, br;q=0.9, gzip;q=0.9", "br"),
+        ("*", "zstd"),
+        ("*;q=0.5, gzip", "gzip"),
+        ("*, zstd;q=0, br;q=0", "gzip"),
+        ("gzip;q=0", None),
+    ],
+)
+def test_choose_encoding(all_encoders, accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+def test_unavailable_encodings_are_skipped(monkeypatch):
+    monkeypatch.delitem(compression.ENCODERS, "br", raising=False)
+    assert choose_encoding("br, gzip;q=0.1") == "gzip"
+    assert choose_encoding("br") is None
+
+
+def test_compression_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings.compression, "enabled", False)
+    assert choose_encoding("gzip") is None
+
+
+@pytest.mark.parametrize("etag, expected", [('"7-abc"', 'W/"7-abc"'), ('W/"7-abc"', 'W/"7-abc"')])
+def test_weaken_etag(etag, expected):
+    assert weaken_etag(etag) == expected
+
+
+def test_flushed_parts_are_decompressible_before_finish():
+    encoder = create_encoder("gzip")
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    for line in LINES:
+        assert decoder.decompress(encoder.compress(line) + encoder.flush()) == line
+    decoder.decompress(encoder.finish())
+    assert decoder.eof
+
+
+def fastapi_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/big")
+    async def big():
+        return Response(BIG_BODY, media_type="application/json", headers={"ETag": '"7-abc"'})
+
+    @app.get("/small")
+    async def small():
+        return Response(BIG_BODY[: MIN_SIZE - 1], media_type="application/json")
+
+    @app.get("/image")
+    async def image():
+        return Response(BIG_BODY, media_type="image/png")
+
+    @app.get("/not-modified")
+    async def not_modified():
+        return Response(status_code=304, headers={"ETag": '"7-abc"'})
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for line in LINES:
+                yield line
+
+        return StreamingResponse(lines(), media_type=NDJSON_CONTENT_TYPE)
+
+    return TestClient(app)
+
+
+def test_fastapi_compresses_and_weakens_etag():
+    response = fastapi_client().get("/big", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == 'W/"7-abc"'
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) < len(BIG_BODY)
+    assert response.content == BIG_BODY
+
+
+@pytest.mark.parametrize(
+    "path, accept_encoding",
+    [("/big", "identity"), ("/small", "gzip"), ("/image", "gzip")],
+)
+def test_fastapi_leaves_response_uncompressed(path, accept_encoding):
+    response = fastapi_client().get(path, headers={"Accept-Encoding": accept_encoding})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.headers.get("ETag") in (None, '"7-abc"')
+
+
+def test_fastapi_passes_not_modified_through():
+    response = fastapi_client().get("/not-modified", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 304
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == '"7-abc"'
+
+
+def test_fastapi_compresses_streams():
+    response = fastapi_client().get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert response.content == b"".join(LINES)
+
+
+@pytest.fixture
+async def aiohttp_client():
+    async def big(request):
+        return web.Response(body=BIG_BODY, content_type="application/json", headers={"ETag": '"7-abc"'})
+
+    async def small(request):
+        return web.Response(body=BIG_BODY[: MIN_SIZE - 1], content_type="application/json")
+
+    async def not_modified(request):
+        return web.Response(status=304, headers={"ETag": '"7-abc"'})
+
+    async def stream(request):
+        response = CompressedStreamResponse(headers={"Content-Type": NDJSON_CONTENT_TYPE})
+        await response.prepare(request)
+        for line in LINES:
+            await response.write(line)
+        await response.write_eof()
+        return response
+
+    app = web.Application(middlewares=[compression_middleware])
+    app.router.add_get("/big", big)
+    app.router.add_get("/small", small)
+    app.router.add_get("/not-modified", not_modified)
+    app.router.add_get("/stream", stream)
+    async with AiohttpTestClient(TestServer(app), auto_decompress=False) as client:
+        yield client
+
+
+async def test_aiohttp_compresses_and_weakens_etag(aiohttp_client):
+    response = await aiohttp_client.get("/big", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == 'W/"7-abc"'
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(await response.read()) == BIG_BODY
+
+
+@pytest.mark.parametrize("path, accept_encoding", [("/big", "identity"), ("/small", "gzip")])
+async def test_aiohttp_leaves_response_uncompressed(aiohttp_client, path, accept_encoding):
+    response = await aiohttp_client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+    assert "Content-Encoding" not in response.headers
+    assert BIG_BODY.startswith(await response.read())
+
+
+async def test_aiohttp_passes_not_modified_through(aiohttp_client):
+    response = await aiohttp_client.get("/not-modified", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status == 304
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == '"7-abc"'
+
+
+@pytest.mark.parametrize("accept_encoding, encoded", [("gzip", True), ("identity", False)])
+async def test_aiohttp_compresses_streams(aiohttp_client, accept_encoding, encoded):
+    response = await aiohttp_client.get("/stream", headers={"Accept-Encoding": accept_encoding})
+
+    body = await response.read()
+    assert ("Content-Encoding" in response.headers) == encoded
+    assert (gzip.decompress(body) if encoded else body) == b"".join(LINES)
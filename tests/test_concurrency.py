@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from common.concurrency import AdaptiveLimiter, LimitExceeded
+
+
+def make_limiter(**kwargs) -> AdaptiveLimiter:
+    options = dict(
+        initial_limit=4,
+        min_limit=1,
+        max_limit=8,
+        max_queue=10,
+        queue_timeout=1,
+        latency_target=0.05,
+        backoff_ratio=0.5,
+    )
+    return AdaptiveLimiter("test", **dict(options, **kwargs))
+
+
+async def run(limiter: AdaptiveLimiter, seconds: float = 0, error: Exception = None):
+    async with limiter.acquire():
+        await asyncio.sleep(seconds)
+        if error:
+            raise error
+
+
+async def test_fast_requests_increase_limit():
+    limiter = make_limiter()
+    for _ in range(4):
+        await run(limiter)
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+    assert limiter.in_flight == 0
+
+
+async def test_increase_stops_at_max_limit():
+    limiter = make_limiter(initial_limit=8)
+    await run(limiter)
+    assert limiter.limit == 8
+
+
+async def test_slow_request_decreases_limit():
+    limiter = make_limiter()
+    await run(limiter, seconds=0.06)
+    assert limiter.limit == 2
+
+
+async def test_overload_error_decreases_limit():
+    limiter = make_limiter(is_overload=lambda error: isinstance(error, RuntimeError))
+    with pytest.raises(ValueError):
+        await run(limiter, error=ValueError())
+    assert limiter.limit > 4
+    with pytest.raises(RuntimeError):
+        await run(limiter, error=RuntimeError())
+    assert limiter.limit < 4
+
+
+async def test_concurrent_slow_requests_decrease_limit_once():
+    limiter = make_limiter()
+    await asyncio.gather(*(run(limiter, seconds=0.06) for _ in range(4)))
+    assert limiter.limit == 2
+
+    # Следующая волна начата после уменьшения и снова уменьшает предел
+    await asyncio.gather(*(run(limiter, seconds=0.06) for _ in range(2)))
+    assert limiter.limit == 1
+
+
+async def test_requests_over_limit_wait_in_queue():
+    limiter = make_limiter(initial_limit=1, min_limit=1, max_limit=1)
+    order = []
+
+    async def request(n):
+        async with limiter.acquire():
+            order.append(n)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request(n) for n in range(3)))
+    assert order == [0, 1, 2]
+    assert limiter.in_flight == 0
+
+
+async def test_queue_timeout_rejects():
+    limiter = make_limiter(initial_limit=1, min_limit=1, max_limit=1, queue_timeout=0.05, latency_target=10)
+    holder = asyncio.create_task(run(limiter, seconds=0.2))
+    await asyncio.sleep(0)
+    with pytest.raises(LimitExceeded) as error:
+        await run(limiter)
+    assert error.value.retry_after >= 0.05
+    await holder
+    assert limiter.in_flight == 0
+    assert not limiter._waiters
+
+
+async def test_full_queue_rejects_immediately():
+    limiter = make_limiter(initial_limit=1, min_limit=1, max_limit=1, max_queue=0, latency_target=10)
+    holder = asyncio.create_task(run(limiter, seconds=0.05))
+    await asyncio.sleep(0)
+    with pytest.raises(LimitExceeded):
+        await run(limiter)
+    await holder
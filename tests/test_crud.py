@@ -0,0 +1,66 @@
+import base64
+
+import pytest
+
+from aiohttp_server import crud
+from aiohttp_server.crud import (
+    MAX_TASK_ID,
+    decode_cursor,
+    decode_search_cursor,
+    encode_cursor,
+    encode_search_cursor,
+)
+from benchmarks.stand_ins import MemoryPool
+
+
+def raw_cursor(value: str) -> str:
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(encode_cursor(MAX_TASK_ID)) == MAX_TASK_ID
+
+
+@pytest.mark.parametrize("value", ["0", "-1", str(MAX_TASK_ID + 1), str(2**63), "abc"])
+def test_decode_cursor_rejects_out_of_range_ids(value):
+    with pytest.raises(ValueError):
+        decode_cursor(raw_cursor(value))
+
+
+def test_search_cursor_round_trip():
+    assert decode_search_cursor(encode_search_cursor(0.6079271, 3)) == (0.6079271, 3)
+
+
+@pytest.mark.parametrize("value", ["0.5:0", f"0.5:{MAX_TASK_ID + 1}", "nan:1", "inf:1", "0.5"])
+def test_decode_search_cursor_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        decode_search_cursor(raw_cursor(value))
+
+
+async def test_writes_bump_tasks_version():
+    pool = MemoryPool()
+    task = await crud.create_task(pool, {"title": "t", "description": "", "status": "В работе", "user_id": None})
+    # Версия увеличивается в транзакции записи и еще раз после фиксации
+    assert await crud.get_tasks_version(pool) == 3
+
+    await crud.update_task(pool, {"id": task["id"], "title": "new"})
+    assert await crud.get_tasks_version(pool) == 5
+
+
+async def test_writes_without_changes_keep_tasks_version():
+    pool = MemoryPool()
+    assert await crud.update_task(pool, {"id": 1, "title": "new"}) is None
+    assert await crud.delete_tasks(pool, [1, 2]) == [None, None]
+    assert await crud.get_tasks_version(pool) == 1
+
+
+async def test_failed_write_keeps_tasks_version():
+    pool = MemoryPool()
+
+    async def write():
+        raise RuntimeError("write failed")
+
+    with pytest.raises(RuntimeError):
+        await crud.write_tasks(await pool.acquire(), write)
+    assert await crud.get_tasks_version(pool) == 1
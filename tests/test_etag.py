@@ -0,0 +1,26 @@
+import pytest
+
+from common.etag import etag_matches, make_etag
+
+ETAG = make_etag(7, "/tasks/", [("limit", "10")])
+
+
+def test_make_etag_is_strong_and_depends_on_version_and_parts():
+    assert ETAG.startswith('"7-') and ETAG.endswith('"')
+    assert make_etag(7, "/tasks/", [("limit", "10")]) == ETAG
+    assert make_etag(8, "/tasks/", [("limit", "10")]) != ETAG
+    assert make_etag(7, "/tasks/", [("limit", "20")]) != ETAG
+    assert make_etag(7, "/tasks/", [("limit", "10")], True) != ETAG
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    [ETAG, f"W/{ETAG}", f'"other", {ETAG}', f' "other" ,W/{ETAG} ', "*", " * "],
+)
+def test_etag_matches(if_none_match):
+    assert etag_matches(if_none_match, ETAG)
+
+
+@pytest.mark.parametrize("if_none_match", [None, "", '"other"', ETAG.strip('"'), f"W/{ETAG}x", "*, " + '"other"'])
+def test_etag_does_not_match(if_none_match):
+    assert not etag_matches(if_none_match, ETAG)
@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+
+from fastapi_app.auth.hasher import PasswordHasher
+
+
+def sample(name: str) -> float:
+    return REGISTRY.get_sample_value(name) or 0.0
+
+
+async def test_hash_and_verify():
+    hasher = PasswordHasher(executor="thread", workers=1, max_queue=1, rounds=4)
+    try:
+        hashed = await hasher.hash("secret")
+        assert await hasher.verify("secret", hashed)
+        assert not await hasher.verify("other", hashed)
+    finally:
+        hasher.shutdown()
+
+
+async def test_metrics_track_queue_and_rejections():
+    hasher = PasswordHasher(executor="thread", workers=1, max_queue=1, rounds=4)
+    in_flight, waiting = sample("password_hash_in_flight"), sample("password_hash_waiting")
+    rejected = sample("password_hash_rejected_total")
+    try:
+        running = asyncio.create_task(hasher._run(time.sleep, 0.2))
+        queued = asyncio.create_task(hasher._run(time.sleep, 0))
+        await asyncio.sleep(0.05)
+        assert sample("password_hash_in_flight") == in_flight + 1
+        assert sample("password_hash_waiting") == waiting + 1
+
+        with pytest.raises(HTTPException) as error:
+            await hasher._run(time.sleep, 0)
+        assert error.value.status_code == 503
+        assert sample("password_hash_rejected_total") == rejected + 1
+
+        await asyncio.gather(running, queued)
+        assert sample("password_hash_in_flight") == in_flight
+        assert sample("password_hash_waiting") == waiting
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,39 @@
+import pytest
+
+from aiohttp_server.database import TasksConnection
+from fastapi_app.database.pg_accessor import PostgresAccessor
+from fastapi_app.tasks import local_backend
+from fastapi_app.tasks.local_backend import LocalTaskBackend
+
+
+class RecordingAccessor(PostgresAccessor):
+    """PostgresAccessor, запоминающий параметры пула вместо подключения к базе."""
+
+    def __init__(self):
+        super().__init__("postgresql://")
+        self.connects = []
+
+    async def connect(self, connection_class=None, init=None):
+        self.connects.append((connection_class, init))
+        self.pool = object()
+
+
+async def test_startup_creates_pool_with_task_connections(monkeypatch):
+    accessor = RecordingAccessor()
+    monkeypatch.setattr(local_backend, "db", accessor)
+
+    await LocalTaskBackend().startup()
+
+    assert accessor.connects == [(TasksConnection, TasksConnection.prepare_statements)]
+    assert accessor.connection_class is not TasksConnection
+    assert accessor.init is None
+
+
+async def test_startup_rejects_existing_pool(monkeypatch):
+    accessor = RecordingAccessor()
+    accessor.pool = object()
+    monkeypatch.setattr(local_backend, "db", accessor)
+
+    with pytest.raises(RuntimeError):
+        await LocalTaskBackend().startup()
+    assert not accessor.connects
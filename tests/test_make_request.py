@@ -0,0 +1,63 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from fastapi import HTTPException
+
+from fastapi_app.tasks import circuit_breaker
+from fastapi_app.tasks.aiohttp_client import AiohttpClientSession, aiohttp_client
+from fastapi_app.tasks.make_request import make_request
+
+
+@pytest.fixture
+async def upstream(monkeypatch):
+    """Сервис задач, отвечающий ответом из routes[path], и сброс общего клиента и автоматов после теста."""
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    routes = {}
+
+    async def handler(request):
+        return routes[request.path]()
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    server = TestServer(app)
+    await server.start_server()
+    yield server, routes
+    await aiohttp_client.close()
+    AiohttpClientSession._client = None
+    await server.close()
+
+
+@pytest.mark.parametrize(
+    "body, content_type",
+    [(b'{"tasks": [', "application/json"), (b"not json", "application/json"), (b"\xc1", "application/msgpack")],
+)
+async def test_invalid_body_is_bad_gateway(upstream, body, content_type):
+    server, routes = upstream
+    routes["/tasks"] = lambda: web.Response(body=body, content_type=content_type)
+    url = str(server.make_url("/tasks"))
+
+    with pytest.raises(HTTPException) as error:
+        await make_request("POST", url, json={})
+    assert error.value.status_code == 502
+    assert circuit_breaker.get_breaker(url).failures == 1
+
+
+async def test_retry_after_is_forwarded(upstream):
+    server, routes = upstream
+    routes["/tasks"] = lambda: web.Response(status=503, headers={"Retry-After": "7"})
+
+    with pytest.raises(HTTPException) as error:
+        await make_request("POST", str(server.make_url("/tasks")), json={})
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "7"}
+
+
+async def test_client_errors_keep_status_without_retry_after(upstream):
+    server, routes = upstream
+    routes["/tasks"] = lambda: web.Response(status=400, reason="Invalid status")
+
+    with pytest.raises(HTTPException) as error:
+        await make_request("POST", str(server.make_url("/tasks")), json={})
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid status"
+    assert error.value.headers is None
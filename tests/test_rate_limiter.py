@@ -0,0 +1,149 @@
+import pytest
+from redis.exceptions import ConnectionError
+
+from config import RateLimit
+from fastapi_app.rate_limit import limiter as limiter_module
+from fastapi_app.rate_limit.limiter import RateLimiter, RateLimitExceeded
+
+
+class StubScript:
+    """Замена Lua-скрипта корзины: отвечает заранее заданными (granted, retry_after)."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    async def __call__(self, keys, args, client):
+        self.calls.append((keys[0], args))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(limiter_module, "monotonic", lambda: now[0])
+    return now
+
+
+def make_limiter(monkeypatch, redis=None, script=None, **kwargs) -> RateLimiter:
+    async def redis_client():
+        return redis
+
+    monkeypatch.setattr(limiter_module, "redis_client", redis_client)
+    options = dict(
+        enabled=True,
+        routes={"tasks": RateLimit(rate=1, burst=10)},
+        lease_fraction=0.5,
+        lease_ttl=1,
+        max_local_buckets=100,
+    )
+    limiter = RateLimiter(**dict(options, **kwargs))
+    limiter._script = script
+    return limiter
+
+
+async def test_leased_tokens_are_spent_locally(monkeypatch, clock):
+    script = StubScript([5, "0"], [5, "0"])
+    limiter = make_limiter(monkeypatch, script=script)
+
+    for _ in range(5):
+        await limiter.check("tasks", "user")
+    assert script.calls == [("rate:tasks:user", [1, 10, 5])]
+
+    await limiter.check("tasks", "user")
+    assert len(script.calls) == 2
+
+
+async def test_lease_expires(monkeypatch, clock):
+    script = StubScript([5, "0"], [5, "0"])
+    limiter = make_limiter(monkeypatch, script=script)
+
+    await limiter.check("tasks", "user")
+    clock[0] += 1
+    await limiter.check("tasks", "user")
+
+    assert len(script.calls) == 2
+
+
+async def test_leases_are_bounded(monkeypatch, clock):
+    script = StubScript(*([[5, "0"]] * 3))
+    limiter = make_limiter(monkeypatch, script=script, max_local_buckets=1)
+
+    await limiter.check("tasks", "first")
+    await limiter.check("tasks", "second")
+    await limiter.check("tasks", "first")
+
+    assert [key for key, _ in script.calls] == ["rate:tasks:first", "rate:tasks:second", "rate:tasks:first"]
+
+
+async def test_empty_bucket_rejects(monkeypatch, clock):
+    limiter = make_limiter(monkeypatch, script=StubScript([0, "0.25"]))
+
+    with pytest.raises(RateLimitExceeded) as error:
+        await limiter.check("tasks", "user")
+    assert error.value.retry_after == 1
+
+
+async def test_redis_errors_allow_requests(monkeypatch, clock):
+    script = StubScript(ConnectionError("redis is down"))
+    limiter = make_limiter(monkeypatch, script=script)
+
+    await limiter.check("tasks", "user")
+    assert len(script.calls) == 1
+
+
+@pytest.mark.parametrize("enabled, route", [(False, "tasks"), (True, "other")])
+async def test_unlimited_requests_skip_redis(monkeypatch, enabled, route):
+    script = StubScript()
+    limiter = make_limiter(monkeypatch, script=script, enabled=enabled)
+
+    await limiter.check(route, "user")
+    assert not script.calls
+
+
+@pytest.fixture
+async def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    redis = fakeredis.FakeAsyncRedis()
+    yield redis
+    await redis.aclose()
+
+
+async def test_token_bucket_script(monkeypatch, fake_redis):
+    limiter = make_limiter(monkeypatch, redis=fake_redis, routes={"tasks": RateLimit(rate=1, burst=3)}, lease_ttl=0)
+
+    for _ in range(3):
+        await limiter.check("tasks", "user")
+    with pytest.raises(RateLimitExceeded) as error:
+        await limiter.check("tasks", "user")
+
+    assert error.value.retry_after == 1
+    assert 0 < await fake_redis.ttl("rate:tasks:user") <= 4
+
+
+async def test_token_bucket_refills(monkeypatch, fake_redis):
+    limiter = make_limiter(monkeypatch, redis=fake_redis, routes={"tasks": RateLimit(rate=1, burst=3)}, lease_ttl=0)
+    for _ in range(3):
+        await limiter.check("tasks", "user")
+
+    # Сдвигаем время последнего списания на две секунды назад: за это время корзина пополнилась на два токена
+    ts = float(await fake_redis.hget("rate:tasks:user", "ts"))
+    await fake_redis.hset("rate:tasks:user", "ts", str(ts - 2))
+
+    for _ in range(2):
+        await limiter.check("tasks", "user")
+    with pytest.raises(RateLimitExceeded):
+        await limiter.check("tasks", "user")
+
+
+async def test_token_bucket_grants_at_most_available(monkeypatch, fake_redis):
+    limiter = make_limiter(monkeypatch, redis=fake_redis)
+    await limiter.check("tasks", "user")
+    assert float(await fake_redis.hget("rate:tasks:user", "tokens")) == pytest.approx(5, abs=0.1)
+
+    granted, _ = await limiter._acquire_from_redis("rate:tasks:user", RateLimit(rate=1, burst=10), 8)
+    assert granted == 5
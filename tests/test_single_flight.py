@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from fastapi_app.tasks.single_flight import SingleFlight
+
+
+def counting(result=None, error: Exception = None, delay: float = 0.05):
+    """Функция для SingleFlight.do, считающая свои вызовы в calls."""
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return result
+
+    return func, calls
+
+
+async def test_concurrent_calls_are_coalesced():
+    single_flight = SingleFlight()
+    func, calls = counting(result={"tasks": []})
+
+    results = await asyncio.gather(*(single_flight.do("key", func) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+async def test_different_keys_are_not_coalesced():
+    single_flight = SingleFlight()
+    func, calls = counting()
+
+    await asyncio.gather(single_flight.do("first", func), single_flight.do("second", func))
+
+    assert len(calls) == 2
+
+
+async def test_key_is_released_after_completion():
+    single_flight = SingleFlight()
+    func, calls = counting()
+
+    await single_flight.do("key", func)
+    await single_flight.do("key", func)
+
+    assert len(calls) == 2
+    assert not single_flight._in_flight
+
+
+async def test_leader_cancellation_does_not_cancel_followers():
+    single_flight = SingleFlight()
+    func, calls = counting(result="done")
+
+    leader = asyncio.create_task(single_flight.do("key", func))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(single_flight.do("key", func))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "done"
+    assert leader.cancelled()
+    assert len(calls) == 1
+
+
+async def test_error_is_propagated_to_all_callers():
+    single_flight = SingleFlight()
+    func, calls = counting(error=RuntimeError("upstream failed"))
+
+    results = await asyncio.gather(*(single_flight.do("key", func) for _ in range(3)), return_exceptions=True)
+
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    with pytest.raises(RuntimeError):
+        await single_flight.do("key", func)
+    assert len(calls) == 2
@@ -0,0 +1,97 @@
+import pytest
+from prometheus_client import REGISTRY
+from redis.exceptions import ConnectionError
+
+from fastapi_app.tasks import cache as cache_module
+from fastapi_app.tasks.cache import TaskListCache
+
+
+def sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class MemoryRedis:
+    """Redis в памяти с командами и скриптом записи, которые использует TaskListCache."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    def register_script(self, script):
+        async def store_within_budget(keys, args, client):
+            budget_key, key = keys
+            payload, size, ttl, max_window_bytes = args
+            used = self.values[budget_key] = self.values.get(budget_key, 0) + size
+            if used > max_window_bytes:
+                return 0
+            self.values[key] = payload
+            return 1
+
+        return store_within_budget
+
+
+class BrokenRedis:
+    async def get(self, key):
+        raise ConnectionError("redis is down")
+
+
+def use_redis(monkeypatch, redis):
+    async def redis_client():
+        return redis
+
+    monkeypatch.setattr(cache_module, "redis_client", redis_client)
+
+
+def fetch_returning(result: dict, calls: list):
+    async def fetch():
+        calls.append(1)
+        return result
+
+    return fetch
+
+
+async def test_hits_and_misses_are_counted(monkeypatch):
+    use_redis(monkeypatch, MemoryRedis())
+    cache = TaskListCache(enabled=True, ttl=30, max_entry_bytes=1024, max_window_bytes=1024)
+    hits = sample("task_list_cache_requests_total", {"result": "hit"})
+    misses = sample("task_list_cache_requests_total", {"result": "miss"})
+    calls = []
+
+    for _ in range(3):
+        assert await cache.get_or_fetch({"limit": 10}, fetch_returning({"tasks": []}, calls)) == {"tasks": []}
+
+    assert len(calls) == 1
+    assert sample("task_list_cache_requests_total", {"result": "miss"}) == misses + 1
+    assert sample("task_list_cache_requests_total", {"result": "hit"}) == hits + 2
+
+
+@pytest.mark.parametrize(
+    "max_entry_bytes, max_window_bytes, reason",
+    [(4, 1024, "too_large"), (1024, 20, "budget")],
+)
+async def test_entries_over_limits_are_not_stored(monkeypatch, max_entry_bytes, max_window_bytes, reason):
+    redis = MemoryRedis()
+    use_redis(monkeypatch, redis)
+    cache = TaskListCache(enabled=True, ttl=30, max_entry_bytes=max_entry_bytes, max_window_bytes=max_window_bytes)
+    skipped = sample("task_list_cache_skipped_total", {"reason": reason})
+    calls = []
+
+    for page in range(2):
+        await cache.get_or_fetch({"page": page}, fetch_returning({"tasks": [1]}, calls))
+
+    stored = [key for key in redis.values if key.startswith(f"{cache.key_prefix}:0:")]
+    assert len(stored) == (1 if reason == "budget" else 0)
+    assert sample("task_list_cache_skipped_total", {"reason": reason}) == skipped + (1 if reason == "budget" else 2)
+
+
+async def test_falls_back_to_fetch_when_redis_fails(monkeypatch):
+    use_redis(monkeypatch, BrokenRedis())
+    cache = TaskListCache(enabled=True, ttl=30, max_entry_bytes=1024, max_window_bytes=1024)
+    errors = sample("task_list_cache_requests_total", {"result": "error"})
+    calls = []
+
+    assert await cache.get_or_fetch({}, fetch_returning({"tasks": []}, calls), version="1") == {"tasks": []}
+    assert calls == [1]
+    assert sample("task_list_cache_requests_total", {"result": "error"}) == errors + 1
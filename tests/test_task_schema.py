@@ -0,0 +1,42 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from fastapi_app.tasks.routes import TaskIdPath
+from fastapi_app.tasks.schema import (
+    MAX_TASK_ID,
+    TITLE_MAX_LENGTH,
+    TaskBatchUpdateSchema,
+    TasksBatchDeleteSchema,
+    TaskSchema,
+    TaskUpdateSchema,
+)
+
+
+def test_title_length_matches_column():
+    TaskSchema(title="t" * TITLE_MAX_LENGTH, description="")
+    with pytest.raises(ValidationError):
+        TaskSchema(title="t" * (TITLE_MAX_LENGTH + 1), description="")
+    with pytest.raises(ValidationError):
+        TaskUpdateSchema(title="t" * (TITLE_MAX_LENGTH + 1))
+    assert TaskUpdateSchema().title is None
+
+
+@pytest.mark.parametrize("task_id", [0, -1, MAX_TASK_ID + 1])
+def test_task_ids_out_of_column_range_are_rejected(task_id):
+    with pytest.raises(ValidationError):
+        TaskBatchUpdateSchema(id=task_id)
+    with pytest.raises(ValidationError):
+        TasksBatchDeleteSchema(ids=[1, task_id])
+
+
+@pytest.mark.parametrize("task_id, status_code", [(1, 200), (MAX_TASK_ID, 200), (0, 422), (MAX_TASK_ID + 1, 422)])
+def test_task_id_path_bounds(task_id, status_code):
+    app = FastAPI()
+
+    @app.get("/{task_id}/")
+    async def get_task(task_id: TaskIdPath):
+        return {"id": task_id}
+
+    assert TestClient(app).get(f"/{task_id}/").status_code == status_code
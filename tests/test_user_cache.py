@@ -0,0 +1,91 @@
+import pytest
+from redis.exceptions import ConnectionError
+
+from fastapi_app.auth import user_cache as user_cache_module
+from fastapi_app.auth.schema import AuthUserSchema, UserDBSchema
+from fastapi_app.auth.user_cache import UserCache
+
+USER = UserDBSchema(id=1, username="user", password_hash=b"hash")
+
+
+class BrokenRedis:
+    async def get(self, key):
+        raise ConnectionError("redis is down")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis is down")
+
+    async def delete(self, key):
+        raise ConnectionError("redis is down")
+
+
+class DictRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+
+def use_redis(monkeypatch, redis):
+    async def redis_client():
+        return redis
+
+    monkeypatch.setattr(user_cache_module, "redis_client", redis_client)
+
+
+async def test_falls_back_to_memory_when_redis_fails(monkeypatch):
+    use_redis(monkeypatch, BrokenRedis())
+    cache = UserCache(max_size=10, ttl=60, use_redis=True)
+
+    await cache.set(USER)
+    assert await cache.get("user") == AuthUserSchema(id=1, username="user")
+    assert await cache.get("missing") is None
+
+
+async def test_password_hash_is_not_cached(monkeypatch):
+    redis = DictRedis()
+    use_redis(monkeypatch, redis)
+    cache = UserCache(max_size=10, ttl=60, use_redis=True)
+
+    await cache.set(USER)
+    assert "password_hash" not in redis.values["user:user"]
+    assert not hasattr(await cache.get("user"), "password_hash")
+
+    other_process = UserCache(max_size=10, ttl=60, use_redis=True)
+    assert await other_process.get("user") == AuthUserSchema(id=1, username="user")
+
+
+@pytest.mark.parametrize("max_size", [1, 2])
+async def test_lru_eviction(max_size):
+    cache = UserCache(max_size=max_size, ttl=60, use_redis=False)
+    await cache.set(AuthUserSchema(id=1, username="first"))
+    await cache.set(AuthUserSchema(id=2, username="second"))
+    assert (await cache.get("first") is not None) == (max_size == 2)
+    assert await cache.get("second") is not None
+
+
+async def test_invalidate_clears_memory_and_redis(monkeypatch):
+    redis = DictRedis()
+    use_redis(monkeypatch, redis)
+    cache = UserCache(max_size=10, ttl=60, use_redis=True)
+    await cache.set(USER)
+
+    await cache.invalidate("user")
+    assert "user:user" not in redis.values
+    assert await cache.get("user") is None
+
+
+async def test_invalidate_without_redis(monkeypatch):
+    use_redis(monkeypatch, BrokenRedis())
+    cache = UserCache(max_size=10, ttl=60, use_redis=True)
+    await cache.set(USER)
+
+    await cache.invalidate("user")
+    assert await cache.get("user") is None